@@ -1,22 +1,24 @@
 import os
 import json
-import glob
-import html
 import re
-from collections import Counter
 import streamlit as st
 import matplotlib.pyplot as plt
-from v1.main import comments_collect_visualization, load_video_metadata
-from v2.output.wordclouds.wordcloud import gerar_nuvem_palavras, file_to_json
+from v1.main import comments_collect_visualization
+from v1.metadata_cache import load_video_metadata
+from v2.data.comment_ingest import DatasetTooLarge, read_comments_dataset
+from v2.data.comment_db import CommentStore, get_db_path, list_stores, open_dataset
+from v2.data.word_index import get_word_index
+from v2.data.author_index import get_author_index
+from v2.data.rankings import get_like_ranking, get_reply_ranking
+from v2.data.key_stats import get_key_stats
+from v2.output.wordclouds.wordcloud import get_nuvem_palavras, file_to_json, WORDCLOUD_PROFILES
 from v1.stats import get_top_authors, get_author_comments
 import plotly.graph_objects as go
 from v2.app_pages.scream_index.scream_index import scream_index_page
 from v2.app_pages.sentiment.sentiment_analysis import sentiment_analysis_page
 from v2.app_pages.toxic.toxic_types import toxic_types_page
-from v2.output.counts.sentiment_type_counts import count_sentiment_types
-from v2.output.counts.toxic_type_counts import count_toxic_types
 from text_classification.CustomModelPage import custom_model_classification_page
-from text_classification.ClassificationPage import classification_page
+from text_classification.ClassificationPage import classification_page, restaurar_classificacao
 from text_classification.ModelComparisonsPage import model_comparisons_page
 
 st.set_page_config(
@@ -73,6 +75,8 @@ st.markdown(
 )
 
 UPLOAD_DIR = 'input'
+# Arquivos exportados pela coleta se chamam comments_<VIDEO_ID>.json(l)(.gz)
+UPLOAD_NAME_PATTERN = r"comments_([\w-]+)\.jsonl?(\.gz)?$"
 
 if not os.path.exists(UPLOAD_DIR):
     os.makedirs(UPLOAD_DIR)
@@ -82,17 +86,41 @@ def landing_page():
 
     st.write('Select one of the options on the sidebar to start analyzing the comments')
 
-    json_file = st.file_uploader('Upload comments.json', type='json')
+    json_file = st.file_uploader('Upload comments.json', type=['json', 'jsonl', 'gz'])
+
+    st.checkbox(
+        'Keep comments in a local SQLite store',
+        key='use_comment_store',
+        help='Author drill-downs served by an indexed SQLite store, and reopening the comments after a restart without uploading again',
+    )
 
     upload_json(json_file)
 
-    st.button('Refresh', on_click=lambda: upload_json(json_file))
+    st.button('Refresh', on_click=lambda: upload_json(json_file, force=True))
+
+    stores = list_stores(UPLOAD_DIR)
+    if stores:
+        col1, col2 = st.columns([3, 1])
+        with col1:
+            store_path = st.selectbox('Stored comments', stores, format_func=os.path.basename)
+        with col2:
+            st.write('')
+            if st.button('Open stored comments'):
+                dataset, video_id = open_dataset(store_path)
+                st.session_state['comments_dataset'] = dataset
+                # O arquivo ainda no uploader conta como já lido: só o Refresh o lê de novo
+                st.session_state['comments_upload_id'] = json_file.file_id if json_file is not None else None
+                if video_id:
+                    st.session_state['VIDEO_ID'] = video_id
+                else:
+                    st.session_state.pop('VIDEO_ID', None)
+                st.success(f'✅ Loaded {len(dataset):,} comments from {os.path.basename(store_path)}')
 
     st.markdown('''
     ## How to Use?
                 
     **1. Upload a JSON File**  
-    - Click the *Browse Files* button above to upload a JSON file.
+    - Click the *Browse Files* button above to upload a JSON file (a JSON array or JSON Lines, one comment per line, optionally gzip-compressed as `.gz`).
                     
     **2. Run Classification (toxicity classification)**  
     - If you haven’t run **Classification** yet, go to the **"Classification"** option in the sidebar.  
@@ -119,26 +147,25 @@ def landing_page():
 
 def most_comments():
     st.title('Top Comments')
-    if st.session_state.get('comments_file') is None:
+    if st.session_state.get('comments_dataset') is None:
         st.warning('⚠️ Please upload a comments.json file first in the "Upload Json" page')
         return
     
-    comments_data = st.session_state['comments_file']
+    comments_data = st.session_state['comments_dataset']
+    comments_frame = comments_data.frame
     
     # Tab 1: Top 10 comentários com mais likes (se existir o campo)
     tab1, tab2, tab3, tab4 = st.tabs(["Top Comments by Likes", "Top Comments by Replies", "Most Used Words", "Top Authors"])
     
     with tab1:
         st.subheader("Top Comments by Likes")
-        # Verificar se existe campo de likes/likeCount
-        comments_with_likes = [c for c in comments_data if 'likeCount' in c or 'likes' in c]
-        if comments_with_likes:
-            # Ordenar por likes
-            sorted_comments = sorted(comments_with_likes, 
-                                   key=lambda x: int(x.get('likeCount', x.get('likes', 0))), 
-                                   reverse=True)[:10]
+        # Verificar se existe campo de likes/likeCount ('likes' é normalizado para likeCount)
+        if comments_data.has_column('likeCount'):
+            n_liked = st.slider('Number of comments to display', 1, 50, 10, key='top_likes_k')
+            # Seleção parcial sobre o ranking de likes, guardado no dataset
+            sorted_comments = comments_data.to_records(get_like_ranking(comments_data).top(n_liked))
             for idx, comment in enumerate(sorted_comments, 1):
-                likes = comment.get('likeCount', comment.get('likes', 0))
+                likes = comment['likeCount']
                 st.write(f"**{idx}. {comment['author']}** ({likes} likes)")
                 st.write(f"> {comment['message']}")
                 st.divider()
@@ -147,17 +174,17 @@ def most_comments():
     
     with tab2:
         st.subheader("Top Comments by Replies")
-        # Verificar se existe campo de replies/replyCount
-        comments_with_replies = [c for c in comments_data if 'replyCount' in c or 'replies' in c]
-        if comments_with_replies:
-            # Ordenar por replies
-            sorted_comments = sorted(comments_with_replies, 
-                                   key=lambda x: int(x.get('replyCount', x.get('replies', 0))), 
-                                   reverse=True)[:10]
-            for idx, comment in enumerate(sorted_comments, 1):
-                replies_count = comment.get('replyCount', 0)
-                replies_list = comment.get('replies', [])
+        # Respostas são linhas do próprio dataset, ligadas ao comentário pai por parent_row
+        if comments_data.has_column('replyCount') or comments_frame['is_reply'].any():
+            n_replied = st.slider('Number of comments to display', 1, 50, 10, key='top_replies_k')
+            # Ordenar por replies (sem replyCount, usa a quantidade de respostas salvas)
+            reply_ranking = get_reply_ranking(comments_data)
+            top_rows = reply_ranking.top(n_replied)
+            sorted_comments = comments_data.to_records(top_rows)
+            for idx, (row, comment) in enumerate(zip(top_rows, sorted_comments), 1):
+                replies_list = comments_data.to_records(reply_ranking.replies_of(row))
                 actual_replies = len(replies_list)
+                replies_count = int(comment.get('replyCount', actual_replies))
                 
                 # Label mostrando quantos replies estão disponíveis
                 if actual_replies < replies_count:
@@ -172,7 +199,7 @@ def most_comments():
                         st.subheader("Replies:")
                         if replies_list:
                             for reply in replies_list:
-                                st.write(f"**{reply['author']}** 👍 {reply.get('likes', 0)}")
+                                st.write(f"**{reply['author']}** 👍 {reply.get('likeCount', 0)}")
                                 st.write(f"> {reply['message']}")
                                 st.divider()
                             if actual_replies < replies_count:
@@ -184,24 +211,11 @@ def most_comments():
         else:
             st.info("Comments data does not contain replies information")
     
-    def normalize_comment_text(text):
-        unescaped = html.unescape(text)
-        cleaned = re.sub(r"[^\w]+", " ", unescaped, flags=re.UNICODE)
-        return cleaned.lower().strip()
-
     with tab3:
         st.subheader("Most Used Words in Comments")
-        # Contar palavras
-        all_words = []
-        for comment in comments_data:
-            words = normalize_comment_text(comment['message']).split()
-            # Remover palavras muito curtas e comuns
-            words = [w for w in words if len(w) > 3]
-            all_words.extend(words)
-        
-        # Contar frequência
-        word_counts = Counter(all_words)
-        top_20_words = word_counts.most_common(20)
+        # Índice invertido palavra -> linhas, construído uma vez por dataset
+        word_index = get_word_index(comments_data)
+        top_20_words = word_index.most_common(20)
         
         if top_20_words:
             # Criar colunas para melhor visualização
@@ -214,12 +228,9 @@ def most_comments():
                 
                 with col:
                     with st.expander(f"**{word}**: {count} occurrences"):
-                        # Encontrar comentários que contêm essa palavra (palavra exata)
-                        comments_with_word = []
-                        for c in comments_data:
-                            words_in_comment = normalize_comment_text(c['message']).split()
-                            if word in words_in_comment:
-                                comments_with_word.append(c)
+                        # Comentários que contêm essa palavra (palavra exata), direto do índice
+                        rows = word_index.rows_with(word)
+                        comments_with_word = comments_frame[['author', 'message']].iloc[rows]
                         
                         st.write(f"Found in {len(comments_with_word)} comments:")
                         
@@ -233,16 +244,16 @@ def most_comments():
                         # Mostrar primeiros 5 ou todos
                         if st.session_state[key]:
                             # Mostrar todos
-                            for comment in comments_with_word:
-                                st.write(f"- **{comment['author']}**: {comment['message']}")
+                            for author, message in zip(comments_with_word['author'], comments_with_word['message']):
+                                st.write(f"- **{author}**: {message}")
                                 st.divider()
                             if st.button("Hide All", key=f"hide_{key}"):
                                 st.session_state[key] = False
                                 st.rerun()
                         else:
                             # Mostrar primeiros 5
-                            for comment in comments_with_word[:5]:
-                                st.write(f"- **{comment['author']}**: {comment['message']}")
+                            for author, message in zip(comments_with_word['author'].head(5), comments_with_word['message'].head(5)):
+                                st.write(f"- **{author}**: {message}")
                                 st.divider()
                             
                             # Mostrar botão "See All" se houver mais de 5
@@ -255,9 +266,15 @@ def most_comments():
             st.divider()
             st.subheader("Word Cloud Visualization")
             
-            if all_words:
-                output_file = gerar_nuvem_palavras(comments_data)
-                st.image(output_file, use_container_width=True)
+            # Preview por padrão; as resoluções maiores só são geradas quando escolhidas
+            profile = st.radio(
+                'Resolution', list(WORDCLOUD_PROFILES), horizontal=True, key='top_words_cloud_profile',
+                format_func=lambda name: f"{name} ({WORDCLOUD_PROFILES[name]['width']}x{WORDCLOUD_PROFILES[name]['height']})"
+            )
+            image = get_nuvem_palavras(comments_data, profile=profile)
+            if image is not None:
+                st.image(image, use_container_width=True)
+                st.download_button('Download PNG', image, file_name=f'wordcloud_{profile}.png', mime='image/png')
             else:
                 st.info("Not enough words to generate word cloud")
         else:
@@ -270,10 +287,11 @@ def most_comments():
         
         if authors:
             for idx, (author, count) in enumerate(authors, 1):
-                with st.expander(f"**{idx}. {author}**: {count} comments"):
+                likes = get_author_index(comments_data).like_sum(author)
+                with st.expander(f"**{idx}. {author}**: {count} comments, {likes} likes"):
                     # Encontrar todos os comentários desse autor
-                    author_comments = [c for c in comments_data if c['author'] == author]
-                    for comment in author_comments:
+                    _, author_comments = get_author_comments(author, comments_data)
+                    for comment in author_comments.to_dict(orient='records'):
                         likes = comment.get('likeCount', 0)
                         replies = comment.get('replyCount', 0)
                         st.write(f"**{comment['message']}**")
@@ -284,39 +302,24 @@ def most_comments():
 
 def show_stats():
     st.title('Key Stats')
-    if st.session_state.get('comments_file') is None:
+    if st.session_state.get('comments_dataset') is None:
         st.warning('⚠️ Please upload a comments.json file first in the "Upload Json" page')
         return
-    comments_data = st.session_state['comments_file']
-
-    total_comments = len(comments_data)
-    total_authors = len(set([comment["author"] for comment in comments_data]))
-    avg_comments_per_person = round(total_comments / total_authors, 2)
-    total_words = sum([len(comment["message"].split()) for comment in comments_data])
-    unique_words = len(set([word for comment in comments_data for word in comment["message"].split()]))
-    avg_words_per_comment = total_words / total_comments
-
-    sentiment_counts = count_sentiment_types(st.session_state['comments_file'])
-    total_positive = sentiment_counts.get('POS', 0)
-    total_neutral = sentiment_counts.get('NEU', 0)
-    total_negative = sentiment_counts.get('NEG', 0)
-    total_toxic = count_toxic_types(st.session_state['comments_file']).get('toxicity', 0)
-
-    # Tenta carregar metadados do vídeo
-    video_metadata = st.session_state.get('video_metadata')
-    video_id = st.session_state.get('VIDEO_ID')
-    if not video_metadata and video_id:
-        video_metadata = load_video_metadata(video_id)
-    
-    # Se não encontrou por VIDEO_ID, procura por arquivos de metadados existentes
-    if not video_metadata:
-        metadata_files = glob.glob("video_metadata_*.json")
-        if metadata_files:
-            try:
-                with open(metadata_files[0], 'r', encoding='utf-8') as f:
-                    video_metadata = json.load(f)
-            except:
-                video_metadata = None
+    # Todos os valores dos cards, memorizados pelo fingerprint do dataset
+    stats = get_key_stats(st.session_state['comments_dataset'])
+    total_comments = stats['total_comments']
+    total_replies = stats['total_replies']
+    total_authors = stats['total_authors']
+    avg_comments_per_person = stats['avg_comments_per_person']
+    total_words = stats['total_words']
+    unique_words = stats['unique_words']
+    total_positive = stats['total_positive']
+    total_neutral = stats['total_neutral']
+    total_negative = stats['total_negative']
+    total_toxic = stats['total_toxic']
+
+    # Metadados do vídeo vêm do cache indexado por VIDEO_ID (sem acessar a API)
+    video_metadata = load_video_metadata(st.session_state.get('VIDEO_ID'))
 
     def create_card(title, value, card_color="lightgray", text_color="black"):
         fig = go.Figure(go.Indicator(
@@ -362,18 +365,66 @@ def show_stats():
     with col3:
         st.plotly_chart(create_card("Negative Sentiment Comments %", (total_negative / total_comments) * 100, card_color="red", text_color="white"), use_container_width=True)
 
-    # Quarta linha - Toxic Comments
+    # Quarta linha - Toxic Comments, Replies
     col1, col2, col3 = st.columns(3)
     with col1:
         st.plotly_chart(create_card("Toxic Comments %", (total_toxic / total_comments) * 100, card_color="red", text_color="white"), use_container_width=True)
+    with col2:
+        st.plotly_chart(create_card("Replies", total_replies, card_color="lightblue", text_color="darkblue"), use_container_width=True)
 
-def upload_json(json_file):
+def upload_json(json_file, force=False):
     if json_file is None:
         return
-    content = json_file.read().decode("utf-8")
-    data = json.loads(content)
+    # O mesmo upload só é lido de novo ao clicar em Refresh
+    if not force and st.session_state.get('comments_upload_id') == json_file.file_id:
+        dataset = st.session_state.get('comments_dataset')
+        # Store marcado depois do upload: salva o dataset já lido, sem reler o arquivo
+        if st.session_state.get('use_comment_store') and dataset is not None and dataset.store is None:
+            save_upload_to_store(dataset, json_file.name)
+        return
+
+    progress_bar = st.progress(0.0, text='Reading comments...')
+
+    def update_progress(bytes_read, total_bytes):
+        fraction = bytes_read / total_bytes if total_bytes else 1.0
+        progress_bar.progress(fraction, text=f'Reading comments... {bytes_read / 1048576:.0f} of {total_bytes / 1048576:.0f} MB')
+
+    try:
+        # Dataset colunar construído uma vez, em streaming, e compartilhado por todas as páginas
+        dataset = read_comments_dataset(json_file, progress=update_progress)
+    except (DatasetTooLarge, ValueError) as e:
+        progress_bar.empty()
+        st.error(f'❌ {e}')
+        return
+    progress_bar.empty()
+
+    # Arquivo já classificado antes (mesmas mensagens e modelos): restaura as colunas do cache
+    if not dataset.has_column('toxicity'):
+        restored = restaurar_classificacao(dataset)
+        if restored is not None:
+            dataset = restored
+            st.success('✅ Classification results restored from cache')
+
+    match = re.match(UPLOAD_NAME_PATTERN, json_file.name)
+    # Sem o id no nome, o VIDEO_ID do upload anterior mostraria os metadados de outro vídeo
+    if match:
+        st.session_state['VIDEO_ID'] = match.group(1)
+    else:
+        st.session_state.pop('VIDEO_ID', None)
+
+    if st.session_state.get('use_comment_store'):
+        save_upload_to_store(dataset, json_file.name)
+
+    st.session_state['comments_dataset'] = dataset
+    st.session_state['comments_upload_id'] = json_file.file_id
 
-    st.session_state['comments_file'] = data
+def save_upload_to_store(dataset, file_name):
+    """Salva o dataset enviado no store SQLite (comments_<VIDEO_ID> ou o nome do arquivo)."""
+    match = re.match(UPLOAD_NAME_PATTERN, file_name)
+    store_name = match.group(1) if match else re.sub(r"[^\w-]+", "_", file_name.split('.')[0])
+    video_id = match.group(1) if match else None
+    with st.spinner('Saving comments to the local store...'):
+        CommentStore(get_db_path(store_name, UPLOAD_DIR)).save_dataset(dataset, video_id)
 
 pagina = st.sidebar.radio(
     'Page',
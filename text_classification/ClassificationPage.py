@@ -4,19 +4,34 @@ from detoxify import Detoxify
 from transformers import pipeline
 from tqdm import tqdm
 from v2.utils.scream_index_calc import calc_scream_index
+from v2.data.comment_dataset import CommentDataset, SCORE_COLUMNS
+from v2.data.comment_db import carry_store
+from v2.output.wordclouds.wordcloud_jobs import prerender_toxic_clouds
+from v2.data.enrichment_cache import get_enrichment_key, load_enrichment, package_version, save_enrichment
 tqdm.pandas()
 
+DETOXIFY_MODEL = "multilingual"
+SENTIMENT_MODEL = "nlptown/bert-base-multilingual-uncased-sentiment"
+SCREAM_INDEX_VERSION = "1"  # Incrementar ao mudar calc_scream_index
+# Identificadores e versões que compõem a chave do cache de resultados
+ENRICHMENT_MODELS = {
+    "detoxify": f"{DETOXIFY_MODEL}@{package_version('detoxify')}",
+    "sentiment": f"{SENTIMENT_MODEL}@{package_version('transformers')}",
+    "scream_index": SCREAM_INDEX_VERSION,
+}
+ENRICHED_COLUMNS = SCORE_COLUMNS + ['sentiment']
+
 @st.cache_resource
 def carregar_modelo():
     with st.spinner("Downloading Detoxify model... this can take a few seconds the first time."):
-        return Detoxify("multilingual", device="cpu")
+        return Detoxify(DETOXIFY_MODEL, device="cpu")
 
 @st.cache_resource
 def carregar_modelo_sentimentos():
     with st.spinner("Downloading sentiment model... this can take a few seconds the first time."):
         return pipeline(
             "text-classification",
-            model="nlptown/bert-base-multilingual-uncased-sentiment"
+            model=SENTIMENT_MODEL
         )
 
 @st.cache_data
@@ -51,41 +66,62 @@ def classificar_sentimento(texto, _modelo):
         st.warning(f"Erro ao classificar sentimento: {str(e)}")
         return {'sentiment': 'NEU', 'sentiment_score': 0.0}
 
+def restaurar_classificacao(dataset):
+    """Retorna `dataset` com as colunas da classificação restauradas do cache,
+    ou None se essas mensagens ainda não foram classificadas."""
+    cached = load_enrichment(get_enrichment_key(dataset.frame['message'], ENRICHMENT_MODELS))
+    if cached is None or len(cached) != len(dataset):
+        return None
+    dfBase = dataset.frame.drop(columns=[c for c in ENRICHED_COLUMNS if c in dataset.frame])
+    return CommentDataset(pd.concat([dfBase, cached], axis=1))
+
 def classification_page():
     st.title("Toxicity Detection")
     
-    if "comments_file" not in st.session_state or not st.session_state.comments_file:
+    if not st.session_state.get('comments_dataset'):
         st.warning('⚠️ Please upload a comments.json file first in the "Upload Json" page')
         return
 
     #file_name = st.selectbox('Uploaded archives', st.session_state.comments_file.keys())
-    dfComentarios = pd.DataFrame(st.session_state['comments_file'])
+    dfComentarios = st.session_state['comments_dataset'].frame
 
     # Remove colunas de toxicidade se já existirem
-    cols_to_drop = ['toxicity', 'severe_toxicity', 'obscene', 'identity_attack',
-                'insult', 'threat', 'sexual_explicit', 'sentiment', 'sentiment_score', 'scream_index']
+    cols_to_drop = SCORE_COLUMNS + ['sentiment']
     dfComentarios = dfComentarios.drop(columns=[c for c in cols_to_drop if c in dfComentarios], errors="ignore")
 
 
-    modelo = carregar_modelo() 
-    modelo_sentimentos = carregar_modelo_sentimentos()
     if st.button("Run Classification"):
-        with st.spinner("Analysing toxicity..."):
-            seriePredicoes = dfComentarios["message"].progress_apply(lambda msg: classificar(msg, modelo))
-            # Converte para DataFrame e concatena aos comentários originais
-            dfPredicoes = pd.json_normalize(seriePredicoes)
+        restaurado = restaurar_classificacao(st.session_state['comments_dataset'])
+        if restaurado is not None:
+            # Mesmas mensagens e mesmos modelos: reaproveita o resultado salvo
+            dfFinal = restaurado.frame
+            st.success("Results restored from the classification cache!")
+        else:
+            # Modelos só são carregados quando não há resultado em cache
+            modelo = carregar_modelo()
+            modelo_sentimentos = carregar_modelo_sentimentos()
+            with st.spinner("Analysing toxicity..."):
+                seriePredicoes = dfComentarios["message"].progress_apply(lambda msg: classificar(msg, modelo))
+                # Converte para DataFrame e concatena aos comentários originais
+                dfPredicoes = pd.json_normalize(seriePredicoes)
 
-            serieSentimentos = dfComentarios["message"].progress_apply(lambda msg: classificar_sentimento(msg, modelo_sentimentos))
-            dfSentimentos = pd.json_normalize(serieSentimentos)
-            
-            # Concatena tudo
-            dfFinal = pd.concat([dfComentarios, dfPredicoes, dfSentimentos], axis=1)
+                serieSentimentos = dfComentarios["message"].progress_apply(lambda msg: classificar_sentimento(msg, modelo_sentimentos))
+                dfSentimentos = pd.json_normalize(serieSentimentos)
+                
+                # Concatena tudo
+                dfFinal = pd.concat([dfComentarios, dfPredicoes, dfSentimentos], axis=1)
+
+                dfFinal['scream_index'] = dfFinal['message'].apply(calc_scream_index)
 
-            dfFinal['scream_index'] = dfFinal['message'].apply(calc_scream_index)
-            st.success("Analysis finished!")
+                chave = get_enrichment_key(dfFinal['message'], ENRICHMENT_MODELS)
+                save_enrichment(chave, dfFinal[[c for c in ENRICHED_COLUMNS if c in dfFinal]])
+                st.success("Analysis finished!")
 
-        json_resultado = dfFinal.to_json(orient="records", force_ascii=False, indent=2)
-        st.session_state['comments_file'] = dfFinal.to_dict(orient="records")
+        st.session_state['comments_dataset'] = carry_store(st.session_state['comments_dataset'], CommentDataset(dfFinal))
+        # Exporta no formato do upload, com as respostas aninhadas
+        json_resultado = st.session_state['comments_dataset'].to_json()
+        # Nuvens dos tipos de toxicidade já ficam prontas para a página Toxic Speech
+        prerender_toxic_clouds(st.session_state['comments_dataset'])
         
         st.download_button(
             label="Download result as JSON",
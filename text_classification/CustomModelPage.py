@@ -5,6 +5,8 @@ from datetime import datetime
 import streamlit as st
 
 from text_classification.Task import Task
+from v2.data.comment_dataset import CommentDataset
+from v2.data.comment_db import carry_store
 
 """
     Text Classification Page
@@ -36,14 +38,14 @@ def custom_model_classification_page():
     st.markdown("Using comments data loaded from the main page.")
 
     # Check if comments data is available
-    if st.session_state.get('comments_file') is None:
+    if st.session_state.get('comments_dataset') is None:
         st.warning('⚠️ Please upload a comments.json file first in the "Upload Json" page')
         return
 
     # Load comments data into DataFrame automatically
     try:
-        # Convert comments list to DataFrame
-        comments_df = pd.DataFrame(st.session_state['comments_file'])
+        # Columnar dataset built at upload time (no per-rerun conversion)
+        comments_df = st.session_state['comments_dataset'].frame
         
         # Configure dataset in current task
         st.session_state.currentTaskInEdition.inputDataset = comments_df
@@ -77,7 +79,9 @@ def custom_model_classification_page():
             st.dataframe(dataset.head(10), use_container_width=True)
 
             # Suggested text columns
-            textColumns = [col for col in dataset.columns if dataset[col].dtype == 'object']
+            textColumns = [col for col in dataset.columns
+                           if pd.api.types.is_object_dtype(dataset[col]) or pd.api.types.is_string_dtype(dataset[col])
+                           or isinstance(dataset[col].dtype, pd.CategoricalDtype)]
 
             selectedTextColumn = st.selectbox(
                 "Select the column containing the text for classification:",
@@ -465,7 +469,9 @@ def custom_model_classification_page():
 
         # Save results if successful
         if success and currentTask.outputDataset is not None:
-            st.session_state['comments_file'] = currentTask.outputDataset.to_dict(orient='records')
+            st.session_state['comments_dataset'] = carry_store(
+                st.session_state['comments_dataset'], CommentDataset(currentTask.outputDataset)
+            )
             try:
                 # Save in the selected format
                 if outputFormat == 'csv':
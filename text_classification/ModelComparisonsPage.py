@@ -9,11 +9,11 @@ def model_comparisons_page():
     st.markdown("Compare results between Detoxify (pre-analyzed) and Custom Model classifications")
     st.markdown("---")
 
-    if 'comments_file' not in st.session_state or st.session_state['comments_file'] is None:
+    if st.session_state.get('comments_dataset') is None:
         st.warning('⚠️ Please upload a comments.json file first in the "Upload Json" page')
         return
 
-    comments_list = st.session_state['comments_file']
+    comments_data = st.session_state['comments_dataset']
     
     if 'selectedTextColumn' not in st.session_state or st.session_state['selectedTextColumn'] is None:
         selected_column = "message"
@@ -40,47 +40,49 @@ def model_comparisons_page():
     if selected_labels:
         st.markdown("### 📊 Data Overview")
 
+        detoxify_is_toxic = comments_data.column('toxicity', 0.0).fillna(0.0) >= 0.5
+        predicted_labels = comments_data.column('predicted_label')
+        custom_labels = predicted_labels.fillna('N/A').astype(str).str.upper()
+        custom_is_toxic = custom_labels.isin(selected_labels)
+
         col1, col2, col3 = st.columns(3)
 
         with col1:
-            st.metric("Total Comments", len(comments_list))
+            st.metric("Total Comments", len(comments_data))
 
         with col2:
-            detoxify_toxic = sum(1 for c in comments_list if c.get('toxicity', 0) >= 0.5)
+            detoxify_toxic = int(detoxify_is_toxic.sum())
             st.metric("Detoxify Toxic (≥0.5)", detoxify_toxic)
 
         with col3:
-            custom_model_toxic = sum(1 for c in comments_list if c.get('predicted_label') in selected_labels)
+            custom_model_toxic = int(predicted_labels.isin(selected_labels).sum())
             st.metric("Custom Model Toxic", custom_model_toxic)
 
         st.markdown("### 📈 Agreement Statistics")
 
+        total_compared = len(comments_data)
+        models_agree = custom_is_toxic == detoxify_is_toxic
+        agreements = int(models_agree.sum())
+
+        # Só as linhas em que os modelos concordam viram dicts para o download
+        agreed_rows = models_agree[models_agree].index
+        agreed_comments = comments_data.to_records(agreed_rows)
         json_data = []
-        agreements = 0
-        total_compared = len(comments_list)
-
-        for i, comment in enumerate(comments_list):
-            detoxify_result = "TOXIC" if comment.get('toxicity', 0) >= 0.5 else "NON-TOXIC"
-            custom_result = comment.get('predicted_label', 'N/A').upper()
-
-            models_agree = False
-            if (custom_result in selected_labels and detoxify_result == "TOXIC") or \
-               (custom_result not in selected_labels and detoxify_result == "NON-TOXIC"):
-                models_agree = True
-                agreements += 1
-
-                comment_dict = {
-                    "id": comment.get('id', f'comment_{i}'),
-                    "author": comment.get('author', 'Unknown'),
-                    "message": comment.get('message', ''),
-                    "detoxify_toxicity": comment.get('toxicity', 0),
-                    "sentiment": comment.get('sentiment', 'N/A'),
-                    "custom_predicted_label": custom_result,
-                    "detoxify_result": detoxify_result,
-                    "custom_result": custom_result,
-                    "models_agree": models_agree,
-                }
-                json_data.append(comment_dict)
+        for i, comment in zip(agreed_rows, agreed_comments):
+            detoxify_result = "TOXIC" if detoxify_is_toxic[i] else "NON-TOXIC"
+            custom_result = custom_labels[i]
+            comment_dict = {
+                "id": comment.get('id', f'comment_{i}'),
+                "author": comment.get('author', 'Unknown'),
+                "message": comment.get('message', ''),
+                "detoxify_toxicity": float(comment.get('toxicity', 0)),
+                "sentiment": comment.get('sentiment', 'N/A'),
+                "custom_predicted_label": custom_result,
+                "detoxify_result": detoxify_result,
+                "custom_result": custom_result,
+                "models_agree": True,
+            }
+            json_data.append(comment_dict)
 
         if json_data:
             json_string = json.dumps(json_data, indent=2, ensure_ascii=False)
@@ -0,0 +1,78 @@
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from v1.client import get_client, require_items
+from v1.collector import collect_video
+
+"""
+    Batch collection
+    Coleta vários vídeos em paralelo compartilhando o mesmo pool de conexões
+    e o mesmo orçamento de cota (o cliente do processo e o scheduler da chave).
+"""
+
+VIDEO_WORKERS = 4  # Vídeos coletados simultaneamente
+MANIFEST_FILE = "manifest.json"
+
+
+def get_playlist_video_ids(playlist_id, api_key):
+    """Retorna os ids dos vídeos de uma playlist, na ordem da playlist.
+
+    Raises:
+        ApiError: se alguma página falhar depois de todas as tentativas, em
+            vez de devolver a playlist incompleta
+    """
+    video_ids = []
+    page_token = None
+    while True:
+        params = {"part": "contentDetails", "playlistId": playlist_id, "maxResults": 50,
+                  "fields": "nextPageToken,items(contentDetails(videoId))", "key": api_key}
+        if page_token:
+            params["pageToken"] = page_token
+        data = require_items(get_client().get("playlistItems", params), "playlistItems")
+        video_ids.extend(item["contentDetails"]["videoId"] for item in data["items"])
+        page_token = data.get("nextPageToken")
+        if not page_token:
+            break
+    return video_ids
+
+
+def collect_videos(video_ids, api_key, directory="", video_workers=VIDEO_WORKERS, **collect_options):
+    """Coleta `video_ids` com até `video_workers` vídeos em paralelo.
+
+    Cada vídeo gera seus próprios `comments_<id>.jsonl` e
+    `video_metadata_<id>.json`; ao final é gravado um `manifest.json` em
+    `directory` com o resumo e os tempos de cada vídeo.
+    `collect_options` é repassado para `collect_video`.
+
+    Returns:
+        dict: o conteúdo do manifesto
+    """
+    video_ids = list(dict.fromkeys(video_ids))  # Remove duplicados mantendo a ordem
+    started_at = time.time()
+
+    def collect_one(video_id):
+        video_started_at = time.time()
+        try:
+            summary = collect_video(video_id, api_key, directory=directory, **collect_options)
+        except Exception as e:
+            summary = {"video_id": video_id, "status": "error", "error": str(e)}
+        summary["started_at"] = video_started_at
+        summary["finished_at"] = time.time()
+        return summary
+
+    with ThreadPoolExecutor(max_workers=max(1, min(video_workers, len(video_ids) or 1))) as executor:
+        summaries = list(executor.map(collect_one, video_ids))
+
+    client = get_client()
+    manifest = {
+        "started_at": started_at,
+        "finished_at": time.time(),
+        "seconds": round(time.time() - started_at, 3),
+        "videos": summaries,
+        "client": client.get_stats(),
+        "quota": client.get_scheduler(api_key).get_stats(),
+    }
+    with open(os.path.join(directory, MANIFEST_FILE), 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=4)
+    return manifest
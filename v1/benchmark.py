@@ -0,0 +1,107 @@
+import argparse
+import json
+import sys
+import tempfile
+import time
+from v1.client import configure_client
+from v1.collector import REPLY_WORKERS, collect_video
+from v1.fake_api import FakeYouTubeAdapter, SyntheticVideo, install_adapter
+from v1.quota import QuotaScheduler
+
+"""
+    Collector benchmark
+    Mede comentários/segundo e requisições/comentário do coletor contra
+    vídeos sintéticos servidos pelo FakeYouTubeAdapter (sem rede).
+
+    Uso:
+        python -m v1.benchmark --sizes 1000 10000 100000 --latency 0.02
+"""
+
+
+def run_benchmark(total_threads, latency=0.0, error_rate=0.0, reply_rate=0.2, max_replies=20,
+                  reply_workers=REPLY_WORKERS, recording=None, video_id=None):
+    """Coleta um vídeo sintético de `total_threads` threads (ou o vídeo
+    `video_id` de uma gravação) e retorna as métricas."""
+    video_id = video_id or f"bench{total_threads}"
+    options = {"latency": latency, "error_rate": error_rate}
+    if recording:
+        adapter = FakeYouTubeAdapter.from_recording(recording, **options)
+    else:
+        video = SyntheticVideo(video_id, total_threads, reply_rate=reply_rate, max_replies=max_replies)
+        adapter = FakeYouTubeAdapter({video_id: video}, **options)
+
+    # Cliente novo a cada execução, sem limite de taxa nem de cota e com backoff curto
+    client = configure_client(
+        pool_size=max(reply_workers, 1),
+        backoff_base=0.001,
+        scheduler=QuotaScheduler(budget=10 ** 12, rate=0),
+    )
+    install_adapter(client, adapter)
+
+    with tempfile.TemporaryDirectory() as directory:
+        started = time.perf_counter()
+        summary = collect_video(video_id, "fake-key", directory=directory, reply_workers=reply_workers, resume=False)
+        seconds = time.perf_counter() - started
+        with open(f"{directory}/comments_{video_id}.jsonl", 'r', encoding='utf-8') as f:
+            comments_with_replies = sum(1 + len(json.loads(line).get("replies", [])) for line in f)
+
+    stats = client.get_stats()
+    return {
+        "threads": total_threads,
+        "comments": comments_with_replies,
+        "seconds": round(seconds, 3),
+        "comments_per_second": round(comments_with_replies / seconds, 1) if seconds else 0.0,
+        "requests": stats["requests"],
+        "requests_per_comment": round(stats["requests"] / comments_with_replies, 4) if comments_with_replies else 0.0,
+        "retries": stats["retries"],
+        "bytes_per_comment": round(stats["bytes_per_comment"], 1),
+        "avg_decode_ms": round(stats["avg_decode_ms"], 3),
+        "calls": dict(adapter.calls),
+        "status": summary["status"],
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the comment collector against a fake YouTube API.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000],
+                        help="Synthetic video sizes in top-level threads (e.g. 1000 1000000)")
+    parser.add_argument("--latency", type=float, default=0.0, help="Simulated latency per request, in seconds")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Probability of an injected 503 per request")
+    parser.add_argument("--reply-rate", type=float, default=0.2, help="Fraction of threads that have replies")
+    parser.add_argument("--max-replies", type=int, default=20, help="Maximum replies per thread")
+    parser.add_argument("--reply-workers", type=int, default=REPLY_WORKERS)
+    parser.add_argument("--recording", default=None,
+                        help="Replay responses recorded with RecordingAdapter instead of a synthetic video")
+    parser.add_argument("--video-id", default=None, help="Recorded video id to replay (with --recording)")
+    args = parser.parse_args(argv)
+    if args.recording and not args.video_id:
+        parser.error("--recording requires --video-id")
+
+    sizes = [0] if args.recording else args.sizes
+    results = []
+    for size in sizes:
+        result = run_benchmark(
+            size,
+            latency=args.latency,
+            error_rate=args.error_rate,
+            reply_rate=args.reply_rate,
+            max_replies=args.max_replies,
+            reply_workers=args.reply_workers,
+            recording=args.recording,
+            video_id=args.video_id,
+        )
+        print(
+            f"{result['threads']:>9} threads | {result['comments']:>9} comments | "
+            f"{result['seconds']:>8.2f}s | {result['comments_per_second']:>10.1f} comments/s | "
+            f"{result['requests_per_comment']:.4f} requests/comment | "
+            f"{result['bytes_per_comment']:.0f} bytes/comment",
+            file=sys.stderr,
+        )
+        results.append(result)
+
+    print(json.dumps(results, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,92 @@
+import json
+import os
+import time
+
+CHECKPOINT_EVERY = 10  # Páginas coletadas entre dois checkpoints
+
+
+def get_checkpoint_path(video_id, directory=""):
+    return os.path.join(directory, f"checkpoint_{video_id}.json")
+
+
+def _write_json(path, data):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+
+def save_checkpoint(video_id, next_page_token, total_collected, directory=""):
+    """Grava o ponto de retomada da coleta de forma atômica.
+    Deve ser chamado somente depois que os comentários coletados até
+    `next_page_token` já estiverem salvos em disco.
+    """
+    checkpoint = {
+        "video_id": video_id,
+        "next_page_token": next_page_token,
+        "total_collected": total_collected,
+        "updated_at": time.time(),
+    }
+    _write_json(get_checkpoint_path(video_id, directory), checkpoint)
+
+
+def load_checkpoint(video_id, directory=""):
+    """Retorna o último checkpoint do vídeo ou None se não houver."""
+    if not video_id:
+        return None
+    try:
+        with open(get_checkpoint_path(video_id, directory), 'r', encoding='utf-8') as f:
+            checkpoint = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+    if not checkpoint.get("next_page_token"):
+        return None
+    return checkpoint
+
+
+def clear_checkpoint(video_id, directory=""):
+    try:
+        os.remove(get_checkpoint_path(video_id, directory))
+    except FileNotFoundError:
+        pass
+
+
+def get_deferred_path(video_id, directory=""):
+    return os.path.join(directory, f"deferred_replies_{video_id}.json")
+
+
+def load_deferred_replies(video_id, directory=""):
+    """Ids das threads do vídeo cujas respostas foram adiadas por falta de cota."""
+    if not video_id:
+        return []
+    try:
+        with open(get_deferred_path(video_id, directory), 'r', encoding='utf-8') as f:
+            return json.load(f).get("parent_ids", [])
+    except (FileNotFoundError, json.JSONDecodeError):
+        return []
+
+
+def save_deferred_replies(video_id, parent_ids, directory=""):
+    """Grava as threads com respostas adiadas; sem nenhuma, remove o arquivo.
+    Como o checkpoint, só deve ser chamado depois que os comentários dessas
+    threads já estiverem salvos em disco.
+    """
+    if not parent_ids:
+        try:
+            os.remove(get_deferred_path(video_id, directory))
+        except FileNotFoundError:
+            pass
+        return
+    _write_json(get_deferred_path(video_id, directory), {
+        "video_id": video_id,
+        "parent_ids": list(parent_ids),
+        "updated_at": time.time(),
+    })
+
+
+def add_deferred_replies(video_id, parent_ids, directory=""):
+    """Acrescenta `parent_ids` às threads com respostas adiadas do vídeo."""
+    if not parent_ids:
+        return
+    saved = load_deferred_replies(video_id, directory)
+    save_deferred_replies(video_id, list(dict.fromkeys(saved + list(parent_ids))), directory)
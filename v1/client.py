@@ -0,0 +1,179 @@
+import random
+import threading
+import time
+import requests
+from requests.adapters import HTTPAdapter
+from v1.quota import QuotaExceeded, get_scheduler
+
+API_BASE_URL = "https://www.googleapis.com/youtube/v3"
+
+POOL_SIZE = 16  # Conexões keep-alive mantidas por host
+TIMEOUT = (5, 30)  # (conexão, leitura) em segundos
+MAX_RETRIES = 5
+BACKOFF_BASE = 0.5  # Espera base em segundos, dobrada a cada nova tentativa
+BACKOFF_MAX = 30.0
+RETRY_STATUS = {429, 500, 502, 503, 504}
+# A API do Google só comprime a resposta quando o User-Agent contém "gzip"
+DEFAULT_HEADERS = {"Accept-Encoding": "gzip", "User-Agent": "VideoVis/1.0 (gzip)"}
+
+
+class ApiError(Exception):
+    """Requisição que continuou falhando depois de todas as tentativas."""
+    pass
+
+
+def require_items(data, endpoint):
+    """Retorna `data` se for uma página válida (com "items"); senão lança ApiError
+    com a mensagem de erro da API, se houver."""
+    if "items" in data:
+        return data
+    message = data.get("error", {}).get("message") if isinstance(data.get("error"), dict) else None
+    raise ApiError(f"YouTube Data API request to {endpoint} failed" + (f": {message}" if message else ""))
+
+
+class YouTubeClient:
+    """Cliente HTTP compartilhado para a YouTube Data API.
+
+    Mantém uma `requests.Session` com pool de conexões keep-alive, repete
+    requisições que falham com 429/5xx ou erro de rede usando backoff
+    exponencial com jitter e acumula estatísticas de uso. Cada tentativa
+    passa antes pelo QuotaScheduler: o `scheduler` informado ou, sem ele, o
+    da chave da API usada na requisição.
+    """
+
+    def __init__(self, pool_size=POOL_SIZE, timeout=TIMEOUT, max_retries=MAX_RETRIES,
+                 backoff_base=BACKOFF_BASE, backoff_max=BACKOFF_MAX, scheduler=None):
+        self.timeout = timeout
+        self.scheduler = scheduler
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+
+        self.session = requests.Session()
+        self.session.headers.update(DEFAULT_HEADERS)
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=0)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+        self._lock = threading.Lock()
+        self.reset_stats()
+
+    def reset_stats(self):
+        with self._lock:
+            self._stats = {
+                "requests": 0,
+                "retries": 0,
+                "errors": 0,
+                "bytes": 0,  # Corpo já descomprimido
+                "wire_bytes": 0,  # Bytes recebidos pela rede (comprimidos)
+                "latency": 0.0,
+                "decode_seconds": 0.0,
+                "comments": 0,
+            }
+
+    def get_stats(self):
+        """Retorna uma cópia das estatísticas, incluindo a latência média em ms
+        e os bytes transferidos por comentário coletado."""
+        with self._lock:
+            stats = dict(self._stats)
+        stats["avg_latency_ms"] = (stats["latency"] / stats["requests"] * 1000) if stats["requests"] else 0.0
+        stats["avg_decode_ms"] = (stats["decode_seconds"] / stats["requests"] * 1000) if stats["requests"] else 0.0
+        stats["bytes_per_comment"] = (stats["wire_bytes"] / stats["comments"]) if stats["comments"] else 0.0
+        return stats
+
+    def get_scheduler(self, api_key=None):
+        """Agendador de cota das requisições feitas com `api_key`."""
+        return self.scheduler if self.scheduler is not None else get_scheduler(api_key)
+
+    def record_comments(self, count):
+        """Registra comentários coletados, base da métrica bytes_per_comment."""
+        self._record(comments=count)
+
+    def _record(self, **values):
+        with self._lock:
+            for key, value in values.items():
+                self._stats[key] += value
+
+    def _backoff(self, attempt, retry_after=None):
+        if retry_after is not None:
+            try:
+                return min(self.backoff_max, float(retry_after))
+            except ValueError:
+                pass
+        # Full jitter: espera aleatória entre 0 e o teto exponencial
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+    def get(self, endpoint, params):
+        """Executa um GET em `endpoint` (ex.: "commentThreads") e retorna o JSON.
+
+        Em caso de falha definitiva retorna o corpo de erro da API ou `{}`,
+        de forma que quem chama possa continuar verificando a chave "items".
+        Lança QuotaExceeded quando o orçamento de cota do scheduler acabou.
+        """
+        return self.fetch(endpoint, params)[1]
+
+    def fetch(self, endpoint, params, headers=None):
+        """Como `get`, mas aceita cabeçalhos extras (ex.: If-None-Match) e
+        retorna (status, json, cabeçalhos da resposta). O status é None
+        quando todas as tentativas falharam por erro de rede."""
+        url = f"{API_BASE_URL}/{endpoint}"
+        attempt = 0
+        while True:
+            self.get_scheduler(params.get("key")).acquire(endpoint)
+            started = time.perf_counter()
+            try:
+                response = self.session.get(url, params=params, headers=headers, timeout=self.timeout)
+            except (requests.ConnectionError, requests.Timeout):
+                self._record(requests=1, errors=1, latency=time.perf_counter() - started)
+                if attempt >= self.max_retries:
+                    return None, {}, {}
+                self._record(retries=1)
+                time.sleep(self._backoff(attempt))
+                attempt += 1
+                continue
+
+            content_size = len(response.content)
+            wire_size = response.raw.tell() if hasattr(response.raw, "tell") else content_size
+            self._record(requests=1, bytes=content_size, wire_bytes=wire_size or content_size,
+                         latency=time.perf_counter() - started)
+
+            if response.status_code in RETRY_STATUS and attempt < self.max_retries:
+                self._record(retries=1)
+                time.sleep(self._backoff(attempt, response.headers.get("Retry-After")))
+                attempt += 1
+                continue
+
+            decode_started = time.perf_counter()
+            try:
+                data = response.json()
+            except ValueError:
+                data = {}
+            self._record(decode_seconds=time.perf_counter() - decode_started)
+            if response.status_code >= 400:
+                self._record(errors=1)
+                reasons = {error.get("reason") for error in data.get("error", {}).get("errors", [])}
+                if reasons & {"quotaExceeded", "dailyLimitExceeded"}:
+                    raise QuotaExceeded("YouTube Data API quota exceeded")
+            return response.status_code, data, response.headers
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def configure_client(**options):
+    """Substitui o cliente compartilhado por um novo criado com `options`
+    (ex.: pool_size, scheduler). Deve ser chamado antes de iniciar a coleta."""
+    global _client
+    with _client_lock:
+        _client = YouTubeClient(**options)
+        return _client
+
+
+def get_client():
+    """Retorna o cliente compartilhado pelo processo, criando-o na primeira chamada."""
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = YouTubeClient()
+        return _client
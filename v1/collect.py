@@ -0,0 +1,102 @@
+import argparse
+import json
+import os
+import sys
+from v1.client import POOL_SIZE, ApiError, configure_client
+from v1.checkpoint import CHECKPOINT_EVERY
+from v1.collector import REPLY_WORKERS
+from v1.batch import VIDEO_WORKERS, collect_videos, get_playlist_video_ids
+from v1.quota import DAILY_QUOTA, REQUESTS_PER_SECOND, QuotaScheduler
+from v1 import comment_store
+
+"""
+    Headless comment collection
+    Executa a paginação completa em um único processo, sem Streamlit.
+
+    Uso:
+        python -m v1.collect --api-key KEY --video-id ID [ID ...] --output-dir data
+        python -m v1.collect --api-key KEY --playlist-id PLAYLIST --video-workers 4
+"""
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Collect YouTube comments without the Streamlit UI.")
+    parser.add_argument("--api-key", default=os.environ.get("GOOGLE_API_KEY"),
+                        help="YouTube Data API key (defaults to $GOOGLE_API_KEY)")
+    parser.add_argument("--video-id", nargs="+", default=[], dest="video_ids",
+                        help="One or more video ids to collect")
+    parser.add_argument("--playlist-id", default=None,
+                        help="Collect every video of this playlist (in addition to --video-id)")
+    parser.add_argument("--video-workers", type=int, default=VIDEO_WORKERS,
+                        help="Videos collected concurrently")
+    parser.add_argument("--output-dir", default=".",
+                        help="Directory for comments_<id>.jsonl and video_metadata_<id>.json")
+    parser.add_argument("--reply-workers", type=int, default=REPLY_WORKERS,
+                        help="Maximum concurrent reply requests per page")
+    parser.add_argument("--checkpoint-every", type=int, default=CHECKPOINT_EVERY,
+                        help="Pages collected between checkpoints")
+    parser.add_argument("--quota-budget", type=int, default=DAILY_QUOTA,
+                        help="Daily quota budget in API units")
+    parser.add_argument("--rate", type=float, default=REQUESTS_PER_SECOND,
+                        help="Maximum API requests per second")
+    parser.add_argument("--quota-state", default=None,
+                        help="File used to share today's quota usage between runs")
+    parser.add_argument("--no-resume", action="store_true",
+                        help="Ignore existing checkpoints and start from the first page")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Keep the existing file and only fetch comments newer than the stored ones")
+    parser.add_argument("--export-json", action="store_true",
+                        help="Also write comments_<id>.json as a JSON array when finished")
+    args = parser.parse_args(argv)
+    if not args.api_key:
+        parser.error("an API key is required (--api-key or $GOOGLE_API_KEY)")
+    if not args.video_ids and not args.playlist_id:
+        parser.error("provide --video-id and/or --playlist-id")
+    return args
+
+
+def print_progress(video_id, total_collected):
+    print(f"[{video_id}] collected {total_collected} comments", file=sys.stderr)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    os.makedirs(args.output_dir, exist_ok=True)
+    configure_client(
+        pool_size=max(POOL_SIZE, args.video_workers * args.reply_workers),
+        scheduler=QuotaScheduler(budget=args.quota_budget, rate=args.rate, state_path=args.quota_state),
+    )
+
+    video_ids = list(args.video_ids)
+    if args.playlist_id:
+        try:
+            video_ids.extend(get_playlist_video_ids(args.playlist_id, args.api_key))
+        except ApiError as e:
+            print(f"Could not list playlist {args.playlist_id}: {e}", file=sys.stderr)
+            return 1
+
+    manifest = collect_videos(
+        video_ids,
+        args.api_key,
+        directory=args.output_dir,
+        video_workers=args.video_workers,
+        reply_workers=args.reply_workers,
+        checkpoint_every=args.checkpoint_every,
+        resume=not args.no_resume,
+        incremental=args.incremental,
+        progress=print_progress,
+    )
+
+    for summary in manifest["videos"]:
+        if summary["status"] == "ok" and args.export_json:
+            video_id = summary["video_id"]
+            store_path = os.path.join(args.output_dir, f"comments_{video_id}.jsonl")
+            with open(os.path.join(args.output_dir, f"comments_{video_id}.json"), 'w', encoding='utf-8') as f:
+                f.write(comment_store.dumps_json_array(store_path))
+
+    print(json.dumps(manifest, indent=2))
+    return 0 if manifest["videos"] and all(summary["status"] == "ok" for summary in manifest["videos"]) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
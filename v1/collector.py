@@ -0,0 +1,294 @@
+import os
+import html
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+from v1.client import ApiError, get_client, require_items
+from v1 import comment_store
+from v1.checkpoint import (
+    CHECKPOINT_EVERY, save_checkpoint, load_checkpoint, clear_checkpoint,
+    add_deferred_replies, load_deferred_replies, save_deferred_replies,
+)
+from v1.quota import QuotaExceeded
+from v1.metadata_cache import get_video_metadata
+
+"""
+    Collector
+    Lógica de coleta da YouTube Data API sem dependência do Streamlit,
+    compartilhada pela página de coleta (v1/main.py) e pela linha de comando.
+"""
+
+REPLY_WORKERS = 8  # Máximo de threads de respostas buscadas em paralelo
+DEFERRED_BATCH = 100  # Threads adiadas completadas (e gravadas) por vez
+
+# Projeções (parâmetro `fields`) com apenas os campos usados pelo coletor
+COMMENT_SNIPPET_FIELDS = "snippet(authorDisplayName,textDisplay,likeCount)"
+LIVE_STATUS_FIELDS = "items(snippet(liveBroadcastContent))"
+THREAD_FIELDS = (
+    "nextPageToken,"
+    f"items(snippet(totalReplyCount,topLevelComment(id,{COMMENT_SNIPPET_FIELDS})),"
+    f"replies(comments({COMMENT_SNIPPET_FIELDS})))"
+)
+REPLY_FIELDS = f"nextPageToken,items({COMMENT_SNIPPET_FIELDS})"
+
+
+def sanitize_message(text):
+    if not text:
+        return ""
+    unescaped = html.unescape(text)
+    unescaped = re.sub(r"<a\s+[^>]*>(.*?)</a>", r"\1", unescaped, flags=re.IGNORECASE)
+    return re.sub(r"<[^>]+>", "", unescaped).strip()
+
+
+def to_reply_entry(reply):
+    reply_snippet = reply["snippet"]
+    return {
+        "author": reply_snippet.get("authorDisplayName", ""),
+        "message": sanitize_message(reply_snippet.get("textDisplay", "")),
+        "likes": reply_snippet.get("likeCount", 0)
+    }
+
+
+def fetch_all_replies(parent_comment_id, api_key):
+    replies = []
+    next_reply_token = None
+    while True:
+        params = {"part": "snippet", "parentId": parent_comment_id, "maxResults": 100, "fields": REPLY_FIELDS, "key": api_key}
+        if next_reply_token:
+            params["pageToken"] = next_reply_token
+        # Uma página com erro interrompe a thread inteira: respostas parciais seriam tomadas como completas
+        replies_data = require_items(get_client().get("comments", params), "comments")
+        replies.extend(to_reply_entry(reply) for reply in replies_data["items"])
+        next_reply_token = replies_data.get("nextPageToken")
+        if not next_reply_token:
+            break
+    return replies
+
+
+def fetch_replies(parent_ids, api_key, reply_workers=REPLY_WORKERS):
+    """Respostas de cada thread em `parent_ids` ({id: respostas}), com no
+    máximo `reply_workers` requisições simultâneas."""
+    if not parent_ids:
+        return {}
+    with ThreadPoolExecutor(max_workers=max(1, min(reply_workers, len(parent_ids)))) as executor:
+        results = executor.map(lambda parent_id: fetch_all_replies(parent_id, api_key), parent_ids)
+        return dict(zip(parent_ids, results))
+
+
+def fetch_comments_page(video_id, api_key, page_token=None, reply_workers=REPLY_WORKERS, skip_ids=None,
+                        deferred=None):
+    """Coleta uma única página de threads de comentários de um vídeo, das
+    mais recentes para as mais antigas.
+    As respostas já embutidas na resposta de commentThreads são usadas
+    diretamente; o endpoint comments só é paginado (em paralelo, com no
+    máximo `reply_workers` requisições simultâneas) para threads com mais
+    respostas do que as embutidas. A ordem dos comentários e das respostas
+    é preservada. Quando a cota restante está na reserva, essa expansão é
+    adiada: ficam apenas as respostas embutidas e os ids dessas threads são
+    acrescentados a `deferred`, para `expand_deferred_replies` completá-las
+    depois. Threads cujo id está em `skip_ids` são descartadas sem buscar
+    suas respostas.
+
+    Returns:
+        tuple: (lista de comentários, token da próxima página ou None)
+
+    Raises:
+        ApiError: se a página (ou a paginação de respostas de alguma thread)
+            falhar depois de todas as tentativas
+    """
+    comments_list = []
+
+    params = {"part": "snippet,replies", "videoId": video_id, "maxResults": 100, "order": "time",
+              "fields": THREAD_FIELDS, "key": api_key}
+    if page_token:
+        params["pageToken"] = page_token
+
+    comments_data = require_items(get_client().get("commentThreads", params), "commentThreads")
+
+    if skip_ids:
+        comments_data["items"] = [
+            item for item in comments_data["items"]
+            if item["snippet"]["topLevelComment"]["id"] not in skip_ids
+        ]
+
+    # Busca em paralelo apenas as threads com respostas além das embutidas
+    parent_ids = [
+        item["snippet"]["topLevelComment"]["id"]
+        for item in comments_data["items"]
+        if item["snippet"].get("totalReplyCount", 0) > len(item.get("replies", {}).get("comments", []))
+    ]
+    scheduler = get_client().get_scheduler(api_key)
+    if parent_ids and not scheduler.can_spend(len(parent_ids)):
+        scheduler.record_deferred_replies(len(parent_ids))
+        if deferred is not None:
+            deferred.extend(parent_ids)
+        parent_ids = []
+    replies_by_parent = fetch_replies(parent_ids, api_key, reply_workers)
+
+    for item in comments_data["items"]:
+        comment = item["snippet"]["topLevelComment"]["snippet"]
+        comment_id = item["snippet"]["topLevelComment"]["id"]
+        author = comment["authorDisplayName"]
+        message = sanitize_message(comment["textDisplay"])
+        likes = comment.get("likeCount", 0)
+        replies_count = item["snippet"].get("totalReplyCount", 0)
+
+        if comment_id in replies_by_parent:
+            replies_list = replies_by_parent[comment_id]
+        else:
+            replies_list = [to_reply_entry(reply) for reply in item.get("replies", {}).get("comments", [])]
+
+        comment_entry = {
+            "id": comment_id,
+            "author": author,
+            "message": message,
+            "likeCount": likes,
+            "replyCount": replies_count,
+            "replies": replies_list
+        }
+        comments_list.append(comment_entry)
+
+    get_client().record_comments(sum(1 + len(entry["replies"]) for entry in comments_list))
+    next_page_token = comments_data.get("nextPageToken")
+    return comments_list, next_page_token
+
+
+def expand_deferred_replies(video_id, api_key, store_path, directory="", reply_workers=REPLY_WORKERS):
+    """Busca as respostas das threads adiadas do vídeo e as grava no store,
+    em lotes de DEFERRED_BATCH threads. Para quando a cota volta à reserva;
+    as threads que faltam continuam registradas para a próxima execução.
+
+    Returns:
+        int: quantidade de threads que continuam adiadas
+
+    Raises:
+        QuotaExceeded, ApiError: como em `fetch_comments_page`; o lote que
+            falhou continua registrado
+    """
+    parent_ids = load_deferred_replies(video_id, directory)
+    scheduler = get_client().get_scheduler(api_key)
+    while parent_ids:
+        batch = parent_ids[:DEFERRED_BATCH]
+        if not scheduler.can_spend(len(batch)):
+            break
+        comment_store.update_replies(store_path, fetch_replies(batch, api_key, reply_workers))
+        parent_ids = parent_ids[len(batch):]
+        save_deferred_replies(video_id, parent_ids, directory)
+    return len(parent_ids)
+
+
+def collect_video(video_id, api_key, directory="", reply_workers=REPLY_WORKERS,
+                  checkpoint_every=CHECKPOINT_EVERY, resume=True, incremental=False, progress=None):
+    """Coleta todas as páginas de comentários de um vídeo em um único processo.
+
+    Os comentários são gravados em `comments_<video_id>.jsonl` dentro de
+    `directory`, com checkpoint a cada `checkpoint_every` páginas. Com
+    `resume=True` a coleta continua a partir do último checkpoint.
+    Com `incremental=True` o arquivo existente é mantido e a coleta para na
+    primeira página em que todos os comentários já estão armazenados.
+    `progress`, se informado, é chamado como progress(video_id, total_coletado).
+    Se a cota acabar, o que já foi coletado é salvo junto com um checkpoint
+    e o status retornado é "quota_exceeded"; se uma página falhar depois de
+    todas as tentativas, o mesmo acontece com o status "error".
+    Threads com respostas adiadas (cota na reserva) ficam registradas em
+    `deferred_replies_<video_id>.json` e são completadas ao fim da coleta,
+    se a cota permitir; as que sobrarem deixam o status "partial" e são
+    completadas pela próxima execução com `resume` ou `incremental`.
+
+    Returns:
+        dict: resumo da coleta (video_id, comments, added, pages, seconds,
+            status, deferred_replies)
+    """
+    started = time.perf_counter()
+    store_path = os.path.join(directory, f"comments_{video_id}.jsonl")
+    summary = {"video_id": video_id, "comments": 0, "added": 0, "pages": 0, "seconds": 0.0, "status": "ok",
+               "deferred_replies": 0}
+
+    incremental = incremental and os.path.exists(store_path)
+    skip_ids = comment_store.load_ids(store_path) if incremental else None
+
+    checkpoint = load_checkpoint(video_id, directory) if resume and not incremental else None
+    # Páginas da coleta anterior completas: falta só completar as respostas adiadas
+    deferred_only = not checkpoint and resume and not incremental and bool(load_deferred_replies(video_id, directory))
+    page_token = None
+    total_collected = 0
+    if checkpoint:
+        page_token = checkpoint["next_page_token"]
+        total_collected = checkpoint.get("total_collected", 0)
+    elif not deferred_only:
+        try:
+            metadata = get_video_metadata(video_id, api_key, directory, ttl=0)
+        except QuotaExceeded:
+            summary["status"] = "quota_exceeded"
+            return summary
+        if metadata is None:
+            summary["status"] = "not_found"
+            return summary
+        if not incremental:
+            comment_store.reset_store(store_path)
+            save_deferred_replies(video_id, [], directory)
+
+    pending = []
+    deferred = []
+    pages_since_checkpoint = 0
+    while not deferred_only:
+        page_deferred = []
+        try:
+            new_comments, next_page = fetch_comments_page(
+                video_id, api_key, page_token, reply_workers, skip_ids, page_deferred
+            )
+        except (QuotaExceeded, ApiError) as e:
+            # Mantém o checkpoint na página que falhou para a retomada
+            summary["added"] += comment_store.append_comments(store_path, pending)
+            add_deferred_replies(video_id, deferred, directory)
+            if page_token and not incremental:
+                save_checkpoint(video_id, page_token, total_collected, directory)
+            summary["comments"] = total_collected
+            _set_failure(summary, e)
+            summary["deferred_replies"] = len(load_deferred_replies(video_id, directory))
+            summary["seconds"] = round(time.perf_counter() - started, 3)
+            return summary
+        pending.extend(new_comments)
+        deferred.extend(page_deferred)
+        total_collected += len(new_comments)
+        pages_since_checkpoint += 1
+        summary["pages"] += 1
+        if progress:
+            progress(video_id, total_collected)
+
+        # No modo incremental, uma página só com ids conhecidos marca o fim dos novos
+        if not next_page or (incremental and not new_comments):
+            break
+        if pages_since_checkpoint >= checkpoint_every:
+            summary["added"] += comment_store.append_comments(store_path, pending)
+            add_deferred_replies(video_id, deferred, directory)
+            if not incremental:
+                save_checkpoint(video_id, next_page, total_collected, directory)
+            pending = []
+            deferred = []
+            pages_since_checkpoint = 0
+        page_token = next_page
+
+    summary["added"] += comment_store.append_comments(store_path, pending)
+    add_deferred_replies(video_id, deferred, directory)
+    if not incremental:
+        clear_checkpoint(video_id, directory)
+    summary["comments"] = total_collected
+
+    try:
+        summary["deferred_replies"] = expand_deferred_replies(video_id, api_key, store_path, directory, reply_workers)
+    except (QuotaExceeded, ApiError) as e:
+        _set_failure(summary, e)
+        summary["deferred_replies"] = len(load_deferred_replies(video_id, directory))
+    if summary["deferred_replies"] and summary["status"] == "ok":
+        summary["status"] = "partial"
+    summary["seconds"] = round(time.perf_counter() - started, 3)
+    return summary
+
+
+def _set_failure(summary, error):
+    if isinstance(error, QuotaExceeded):
+        summary["status"] = "quota_exceeded"
+    else:
+        summary["status"] = "error"
+        summary["error"] = str(error)
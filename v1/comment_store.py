@@ -0,0 +1,144 @@
+import json
+import os
+import threading
+
+"""
+    Comment Store
+    Armazena comentários em JSONL (um comentário por linha, somente append)
+    com um índice de ids persistido ao lado, de forma que adicionar uma
+    página de comentários custe O(página) independente do tamanho do arquivo.
+"""
+
+_ids_cache = {}  # caminho do índice -> (tamanho em bytes, set de ids)
+_lock = threading.Lock()
+
+
+def get_index_path(store_path):
+    return f"{os.path.splitext(store_path)[0]}.ids"
+
+
+def _read_ids(store_path):
+    """Carrega o índice de ids do disco, reconstruindo-o a partir do JSONL se faltar."""
+    index_path = get_index_path(store_path)
+    if not os.path.exists(index_path):
+        ids = [comment['id'] for comment in iter_comments(store_path) if 'id' in comment]
+        with open(index_path, 'w', encoding='utf-8') as f:
+            f.writelines(f"{comment_id}\n" for comment_id in ids)
+    with open(index_path, 'r', encoding='utf-8') as f:
+        return {line.rstrip('\n') for line in f if line.strip()}
+
+
+def load_ids(store_path):
+    """Retorna o set de ids já armazenados, usando o cache em memória quando
+    o índice não foi alterado desde a última leitura."""
+    index_path = get_index_path(store_path)
+    size = os.path.getsize(index_path) if os.path.exists(index_path) else None
+    cached = _ids_cache.get(index_path)
+    if cached is not None and size is not None and cached[0] == size:
+        return cached[1]
+    ids = _read_ids(store_path)
+    _ids_cache[index_path] = (os.path.getsize(index_path), ids)
+    return ids
+
+
+def iter_comments(store_path):
+    """Percorre os comentários do arquivo JSONL sem carregá-lo inteiro."""
+    try:
+        with open(store_path, 'r', encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError:
+                    continue  # Linha incompleta de uma escrita interrompida
+    except FileNotFoundError:
+        return
+
+
+def load_comments(store_path):
+    return list(iter_comments(store_path))
+
+
+def append_comments(store_path, comments):
+    """Acrescenta ao store apenas os comentários cujo id ainda não existe.
+    Retorna a quantidade de comentários efetivamente adicionados."""
+    with _lock:
+        ids = load_ids(store_path)
+        new_comments = []
+        for comment in comments:
+            comment_id = comment.get('id')
+            if comment_id is not None:
+                if comment_id in ids:
+                    continue
+                ids.add(comment_id)
+            new_comments.append(comment)
+        if not new_comments:
+            return 0
+
+        with open(store_path, 'a', encoding='utf-8') as f:
+            f.writelines(json.dumps(comment, ensure_ascii=False) + "\n" for comment in new_comments)
+        index_path = get_index_path(store_path)
+        with open(index_path, 'a', encoding='utf-8') as f:
+            f.writelines(f"{comment['id']}\n" for comment in new_comments if 'id' in comment)
+        _ids_cache[index_path] = (os.path.getsize(index_path), ids)
+        return len(new_comments)
+
+
+def update_replies(store_path, replies_by_id):
+    """Substitui as respostas dos comentários cujo id está em `replies_by_id`.
+    Reescreve o arquivo (de forma atômica), então é usado só para completar
+    threads cujas respostas foram adiadas. Retorna quantos foram atualizados."""
+    with _lock:
+        if not os.path.exists(store_path):
+            return 0
+        updated = 0
+        tmp_path = f"{store_path}.tmp"
+        with open(store_path, 'r', encoding='utf-8') as src, open(tmp_path, 'w', encoding='utf-8') as dst:
+            for line in src:
+                try:
+                    comment = json.loads(line)
+                except json.JSONDecodeError:
+                    dst.write(line)  # Linhas vazias ou incompletas ficam como estão
+                    continue
+                if comment.get('id') in replies_by_id:
+                    comment['replies'] = replies_by_id[comment['id']]
+                    line = json.dumps(comment, ensure_ascii=False) + "\n"
+                    updated += 1
+                dst.write(line)
+        os.replace(tmp_path, store_path)
+        return updated
+
+
+def reset_store(store_path):
+    """Esvazia o store e o índice de ids."""
+    with _lock:
+        index_path = get_index_path(store_path)
+        for path in (store_path, index_path):
+            open(path, 'w', encoding='utf-8').close()
+        _ids_cache[index_path] = (0, set())
+
+
+def import_json_array(json_path, store_path):
+    """Converte um arquivo no formato antigo (array JSON) para o store JSONL."""
+    with open(json_path, 'r', encoding='utf-8') as f:
+        content = f.read()
+    comments = json.loads(content) if content.strip() else []
+    reset_store(store_path)
+    return append_comments(store_path, comments)
+
+
+def dumps_json_array(store_path, indent=2):
+    """Exporta o store como array JSON (formato usado no download e no upload)."""
+    return json.dumps(load_comments(store_path), indent=indent, ensure_ascii=False)
+
+
+def loads_comments(content):
+    """Lê comentários tanto de um array JSON quanto de JSONL."""
+    stripped = content.lstrip()
+    if not stripped:
+        return []
+    if stripped[0] == '[':
+        return json.loads(stripped)
+    return [json.loads(line) for line in stripped.splitlines() if line.strip()]
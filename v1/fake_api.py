@@ -0,0 +1,288 @@
+import json
+import random
+import threading
+import time
+from urllib.parse import urlparse, parse_qsl
+import requests
+from requests.adapters import HTTPAdapter
+from v1.client import API_BASE_URL
+
+"""
+    Fake YouTube Data API
+    Adaptadores de transporte para `requests` que permitem testar e medir o
+    coletor sem chave de API nem rede:
+
+    - FakeYouTubeAdapter gera vídeos sintéticos (ou reproduz respostas
+      gravadas) com latência, profundidade de paginação, quantidade de
+      respostas e injeção de erros configuráveis;
+    - RecordingAdapter grava as respostas reais da API em um arquivo JSON
+      que pode ser reproduzido depois pelo FakeYouTubeAdapter.
+
+    Uso:
+        adapter = FakeYouTubeAdapter({"video1": SyntheticVideo("video1", 10000)})
+        install_adapter(get_client(), adapter)
+"""
+
+EMBEDDED_REPLIES = 5  # Respostas embutidas por thread em commentThreads (como na API real)
+
+
+def _request_key(endpoint, params):
+    """Chave estável de uma requisição, ignorando a chave de API."""
+    items = sorted((k, v) for k, v in params.items() if k != "key")
+    return f"{endpoint}?{'&'.join(f'{k}={v}' for k, v in items)}"
+
+
+def _parse_fields(spec):
+    """Converte a sintaxe de `fields` ("a,b(c,d)") em uma árvore {campo: subárvore}."""
+    def parse(position):
+        tree = {}
+        name = ""
+        while position < len(spec):
+            char = spec[position]
+            if char == "(":
+                tree[name], position = parse(position + 1)
+                name = ""
+                continue
+            if char in ",)":
+                if name:
+                    tree[name] = None
+                name = ""
+                position += 1
+                if char == ")":
+                    return tree, position
+                continue
+            name += char.strip()
+            position += 1
+        if name:
+            tree[name] = None
+        return tree, position
+    return parse(0)[0]
+
+
+def _project(payload, tree):
+    """Mantém em `payload` apenas os campos de `tree`, como na resposta parcial da API."""
+    if tree is None:
+        return payload
+    if isinstance(payload, list):
+        return [_project(item, tree) for item in payload]
+    if isinstance(payload, dict):
+        return {key: _project(payload[key], subtree) for key, subtree in tree.items() if key in payload}
+    return payload
+
+
+def _build_response(request, status_code, payload, headers=None):
+    response = requests.Response()
+    response.status_code = status_code
+    response._content = json.dumps(payload).encode("utf-8") if payload is not None else b""
+    response.headers.update({"Content-Type": "application/json; charset=UTF-8"})
+    response.headers.update(headers or {})
+    response.encoding = "utf-8"
+    response.url = request.url
+    response.request = request
+    response.reason = "OK" if status_code < 400 else "Error"
+    return response
+
+
+class SyntheticVideo:
+    """Vídeo sintético com `total_threads` threads geradas sob demanda.
+
+    A quantidade de respostas de cada thread é determinística (derivada de
+    `seed`): uma fração `reply_rate` das threads tem entre 1 e `max_replies`
+    respostas. Nada é mantido em memória, então vídeos de 1M de comentários
+    custam o mesmo que vídeos pequenos. As threads são servidas da mais
+    recente (maior índice) para a mais antiga, como em order=time; aumentar
+    `total_threads` simula novos comentários no topo.
+    """
+
+    def __init__(self, video_id, total_threads, reply_rate=0.2, max_replies=20, seed=0, view_count=None):
+        self.video_id = video_id
+        self.total_threads = total_threads
+        self.reply_rate = reply_rate
+        self.max_replies = max_replies
+        self.seed = seed
+        self.view_count = view_count if view_count is not None else total_threads * 50
+
+    def reply_count(self, index):
+        rng = random.Random(f"{self.seed}-{self.video_id}-{index}")
+        if rng.random() >= self.reply_rate:
+            return 0
+        return rng.randint(1, self.max_replies)
+
+    def total_comments(self):
+        return sum(1 + self.reply_count(index) for index in range(self.total_threads))
+
+    def thread_id(self, index):
+        return f"{self.video_id}-t{index}"
+
+    def comment_snippet(self, comment_id, index):
+        return {
+            "authorDisplayName": f"@author{index % 997}",
+            "textDisplay": f"Comentário {comment_id} sobre o vídeo &amp; <b>teste</b>",
+            "likeCount": index % 113,
+        }
+
+    def reply_resource(self, thread_index, reply_index):
+        reply_id = f"{self.thread_id(thread_index)}.r{reply_index}"
+        return {"id": reply_id, "snippet": self.comment_snippet(reply_id, thread_index + reply_index)}
+
+    def thread_resource(self, index):
+        thread_id = self.thread_id(index)
+        replies = self.reply_count(index)
+        resource = {
+            "id": thread_id,
+            "snippet": {
+                "topLevelComment": {"id": thread_id, "snippet": self.comment_snippet(thread_id, index)},
+                "totalReplyCount": replies,
+            },
+        }
+        if replies:
+            resource["replies"] = {
+                "comments": [self.reply_resource(index, r) for r in range(min(replies, EMBEDDED_REPLIES))]
+            }
+        return resource
+
+
+class FakeYouTubeAdapter(HTTPAdapter):
+    """Adaptador que responde às rotas videos, commentThreads, comments e
+    playlistItems a partir de vídeos sintéticos e/ou respostas gravadas.
+
+    Args:
+        videos (dict): video_id -> SyntheticVideo
+        recordings (dict): chave de requisição -> {"status": int, "body": dict}
+        latency (float): atraso em segundos aplicado a cada requisição
+        error_rate (float): probabilidade de responder com um erro transitório
+        error_status (int): status usado nos erros injetados (ex.: 503, 429)
+        page_size (int): máximo de itens por página
+        playlists (dict): playlist_id -> lista de video_ids
+    """
+
+    def __init__(self, videos=None, recordings=None, latency=0.0, error_rate=0.0, error_status=503,
+                 page_size=100, playlists=None, seed=0):
+        super().__init__()
+        self.videos = videos or {}
+        self.recordings = recordings or {}
+        self.latency = latency
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.page_size = page_size
+        self.playlists = playlists or {}
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self.calls = {}
+
+    @classmethod
+    def from_recording(cls, path, **options):
+        with open(path, 'r', encoding='utf-8') as f:
+            return cls(recordings=json.load(f), **options)
+
+    def send(self, request, stream=False, timeout=None, verify=True, cert=None, proxies=None):
+        parsed = urlparse(request.url)
+        endpoint = parsed.path.rstrip("/").rsplit("/", 1)[-1]
+        params = dict(parse_qsl(parsed.query))
+
+        with self._lock:
+            self.calls[endpoint] = self.calls.get(endpoint, 0) + 1
+            inject_error = self._rng.random() < self.error_rate
+        if self.latency:
+            time.sleep(self.latency)
+        if inject_error:
+            return _build_response(request, self.error_status, {"error": {"code": self.error_status, "errors": [{"reason": "backendError"}]}})
+
+        recorded = self.recordings.get(_request_key(endpoint, params))
+        if recorded is not None:
+            return _build_response(request, recorded.get("status", 200), recorded["body"])
+
+        handler = getattr(self, f"_handle_{endpoint}", None)
+        if handler is None:
+            return _build_response(request, 404, {"error": {"code": 404, "errors": [{"reason": "notFound"}]}})
+        payload = handler(params)
+        headers = {}
+        if "etag" in payload:
+            headers["ETag"] = payload["etag"]
+            if request.headers.get("If-None-Match") == payload["etag"]:
+                return _build_response(request, 304, None, headers)
+        if params.get("fields"):
+            payload = _project(payload, _parse_fields(params["fields"]))
+        return _build_response(request, 200, payload, headers)
+
+    def _page(self, params, total):
+        start = int(params.get("pageToken") or 0)
+        size = min(int(params.get("maxResults") or self.page_size), self.page_size)
+        end = min(start + size, total)
+        return start, end, (str(end) if end < total else None)
+
+    def _with_token(self, payload, next_token):
+        if next_token:
+            payload["nextPageToken"] = next_token
+        return payload
+
+    def _handle_videos(self, params):
+        video = self.videos.get(params.get("id"))
+        if video is None:
+            return {"items": []}
+        return {"etag": f'"{video.video_id}-{video.view_count}"', "items": [{
+            "id": video.video_id,
+            "snippet": {"title": f"Synthetic video {video.video_id}", "liveBroadcastContent": "none"},
+            "statistics": {"viewCount": str(video.view_count), "likeCount": str(video.view_count // 20),
+                           "commentCount": str(video.total_threads)},
+        }]}
+
+    def _handle_commentThreads(self, params):
+        video = self.videos.get(params.get("videoId"))
+        if video is None:
+            return {"error": {"code": 404, "errors": [{"reason": "videoNotFound"}]}}
+        start, end, next_token = self._page(params, video.total_threads)
+        items = [video.thread_resource(video.total_threads - 1 - position) for position in range(start, end)]
+        return self._with_token({"items": items}, next_token)
+
+    def _handle_comments(self, params):
+        video_id, _, thread = params.get("parentId", "").rpartition("-t")
+        video = self.videos.get(video_id)
+        if video is None or not thread.isdigit():
+            return {"items": []}
+        thread_index = int(thread)
+        start, end, next_token = self._page(params, video.reply_count(thread_index))
+        items = [video.reply_resource(thread_index, r) for r in range(start, end)]
+        return self._with_token({"items": items}, next_token)
+
+    def _handle_playlistItems(self, params):
+        video_ids = self.playlists.get(params.get("playlistId"), [])
+        start, end, next_token = self._page(params, len(video_ids))
+        items = [{"contentDetails": {"videoId": video_id}} for video_id in video_ids[start:end]]
+        return self._with_token({"items": items}, next_token)
+
+
+class RecordingAdapter(HTTPAdapter):
+    """Repassa as requisições para a API real e grava as respostas, sem a
+    chave de API, em um dicionário que pode ser salvo com `save`."""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.recordings = {}
+        self._lock = threading.Lock()
+
+    def send(self, request, **kwargs):
+        response = super().send(request, **kwargs)
+        parsed = urlparse(request.url)
+        endpoint = parsed.path.rstrip("/").rsplit("/", 1)[-1]
+        try:
+            body = response.json()
+        except ValueError:
+            return response
+        with self._lock:
+            self.recordings[_request_key(endpoint, dict(parse_qsl(parsed.query)))] = {
+                "status": response.status_code,
+                "body": body,
+            }
+        return response
+
+    def save(self, path):
+        with self._lock:
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump(self.recordings, f, ensure_ascii=False)
+
+
+def install_adapter(client, adapter):
+    """Monta `adapter` para todas as URLs da API no cliente informado."""
+    client.session.mount(API_BASE_URL, adapter)
+    return adapter
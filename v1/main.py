@@ -1,22 +1,40 @@
-import requests
 import json
 import time
 import os
-import html
-import re
 import streamlit as st
+from v1.client import ApiError, get_client
+from v1 import comment_store
+from v1.checkpoint import (
+    CHECKPOINT_EVERY, save_checkpoint, load_checkpoint, clear_checkpoint,
+    add_deferred_replies, load_deferred_replies, save_deferred_replies,
+)
+from v1.quota import QuotaExceeded
+from v1.collector import (
+    REPLY_WORKERS,
+    LIVE_STATUS_FIELDS,
+    expand_deferred_replies,
+    fetch_comments_page,
+)
+from v1.metadata_cache import get_video_metadata
 
 WAIT_TIME = 20  # Tempo de espera em segundos
 
 def get_comments_file_path():
-    """Retorna o caminho do arquivo de comentários específico para o vídeo atual.
-    Usa `comments_<VIDEO_ID>.json` quando houver `VIDEO_ID` na sessão;
-    caso contrário, utiliza `comments.json` como padrão.
+    """Retorna o caminho do store JSONL de comentários do vídeo atual.
+    Usa `comments_<VIDEO_ID>.jsonl` quando houver `VIDEO_ID` na sessão;
+    caso contrário, utiliza `comments.jsonl` como padrão. Um arquivo
+    `.json` no formato antigo (array JSON) é convertido na primeira leitura.
     """
     video_id = st.session_state.get('VIDEO_ID')
-    if video_id:
-        return f"comments_{video_id}.json"
-    return "comments.json"
+    base_name = f"comments_{video_id}" if video_id else "comments"
+    store_path = f"{base_name}.jsonl"
+    legacy_path = f"{base_name}.json"
+    if not os.path.exists(store_path) and os.path.exists(legacy_path):
+        try:
+            comment_store.import_json_array(legacy_path, store_path)
+        except json.JSONDecodeError:
+            pass  # Arquivo antigo corrompido: começa um store vazio
+    return store_path
 
 def comments_collect_visualization():
     st.title('Comment Collection')
@@ -31,6 +49,12 @@ def comments_collect_visualization():
         st.session_state.comments_list = []
     if 'total_collected' not in st.session_state:
         st.session_state.total_collected = 0
+    if 'pages_since_checkpoint' not in st.session_state:
+        st.session_state.pages_since_checkpoint = 0
+    if 'incremental_collection' not in st.session_state:
+        st.session_state.incremental_collection = False
+    if 'deferred_replies' not in st.session_state:
+        st.session_state.deferred_replies = []
 
     api_key = st.text_input("API Key (Google)", type="password", key="google_api_key")
     if api_key:
@@ -49,6 +73,11 @@ def comments_collect_visualization():
     if video_id:
         st.session_state['VIDEO_ID'] = video_id
 
+    incremental = st.checkbox(
+        "Only collect new comments",
+        help="Keeps the comments already collected for this video and stops as soon as a page contains only known comments."
+    )
+
     col1, col2, col3 = st.columns([1, 1, 2])
 
     with col1:
@@ -56,11 +85,15 @@ def comments_collect_visualization():
             if not api_key or not video_id:
                 st.error("Please provide both API Key and Video ID")
             else:
-                video_url = f"https://www.googleapis.com/youtube/v3/videos?part=snippet&id={video_id}&key={api_key}"
-                video_response = requests.get(video_url)
-                video_data = video_response.json()
+                try:
+                    video_data = get_client().get("videos", {"part": "snippet", "id": video_id, "fields": LIVE_STATUS_FIELDS, "key": api_key})
+                except QuotaExceeded as e:
+                    st.error(f"{e}. Try again after the daily quota resets.")
+                    video_data = None
 
-                if "items" in video_data and len(video_data["items"]) > 0:
+                if video_data is None:
+                    pass
+                elif "items" in video_data and len(video_data["items"]) > 0:
                     live_broadcast_content = video_data["items"][0]["snippet"].get("liveBroadcastContent", "none")
                     if live_broadcast_content == "live":
                         st.error("Live videos are not supported. Please use a regular video or a finished live stream.")
@@ -68,11 +101,18 @@ def comments_collect_visualization():
                         st.markdown("[**StreamVis Live - Live Stream Analytics**](https://streamvis21.streamlit.app/)", unsafe_allow_html=True)
                         st.markdown("*This tool supports real-time live stream comment collection and analysis.*")
                     else:
-                        save_comments([])
+                        if not incremental:
+                            save_comments([])
+                            clear_checkpoint(video_id)
+                            save_deferred_replies(video_id, [])
+                        get_client().reset_stats()
+                        st.session_state.incremental_collection = incremental
                         st.session_state.collecting = True
                         st.session_state.next_page_token = None
                         st.session_state.comments_list = []
+                        st.session_state.deferred_replies = []
                         st.session_state.total_collected = 0
+                        st.session_state.pages_since_checkpoint = 0
                         st.rerun() 
                 else:
                     st.error("Video not found. Check API Key and Video ID.")
@@ -81,42 +121,127 @@ def comments_collect_visualization():
         if st.button("Cancel"):
             if st.session_state.collecting:
                 append_new_comments(st.session_state.comments_list)
+                flush_deferred_replies()
+                if st.session_state.next_page_token and not st.session_state.incremental_collection:
+                    save_checkpoint(st.session_state.get('VIDEO_ID'), st.session_state.next_page_token, st.session_state.total_collected)
                 st.warning(f"Collection cancelled. {st.session_state.total_collected} comments were saved.")
             
             st.session_state.collecting = False
             st.session_state.next_page_token = None
             st.session_state.comments_list = []
             st.session_state.total_collected = 0
+            st.session_state.pages_since_checkpoint = 0
             st.rerun()
 
+    checkpoint = None if st.session_state.collecting else load_checkpoint(st.session_state.get('VIDEO_ID'))
+    deferred = [] if st.session_state.collecting or checkpoint else load_deferred_replies(st.session_state.get('VIDEO_ID'))
+    with col3:
+        if deferred and st.button("Fetch deferred replies"):
+            if not api_key:
+                st.error("Please provide the API Key to fetch the replies")
+            else:
+                complete_deferred_replies()
+                deferred = load_deferred_replies(st.session_state.get('VIDEO_ID'))
+        if checkpoint and st.button("Resume Collection"):
+            if not api_key:
+                st.error("Please provide the API Key to resume")
+            else:
+                get_client().reset_stats()
+                st.session_state.incremental_collection = False
+                st.session_state.collecting = True
+                st.session_state.next_page_token = checkpoint["next_page_token"]
+                st.session_state.comments_list = []
+                st.session_state.deferred_replies = []
+                st.session_state.total_collected = checkpoint.get("total_collected", 0)
+                st.session_state.pages_since_checkpoint = 0
+                st.rerun()
+    if checkpoint:
+        st.info(f"An interrupted collection for this video was found ({checkpoint.get('total_collected', 0)} comments saved). Click 'Resume Collection' to continue from where it stopped.")
+    elif deferred:
+        st.info(f"{len(deferred)} threads of this video still miss replies deferred to save quota. Click 'Fetch deferred replies' to complete them.")
+
     if st.session_state.collecting:
         status_text = st.empty()
+        incremental_collection = st.session_state.incremental_collection
+        skip_ids = comment_store.load_ids(get_comments_file_path()) if incremental_collection else None
 
         st.info("Detected: Regular video (or finished live). Collection in progress...")
 
         status_text.text(f"Collecting comments... | Collected so far: {st.session_state.total_collected}")
-        new_comments, next_page = get_video_comments_page(st.session_state.next_page_token)
+        page_deferred = []
+        try:
+            new_comments, next_page = get_video_comments_page(st.session_state.next_page_token, skip_ids=skip_ids, deferred=page_deferred)
+        except QuotaExceeded as e:
+            # Salva o que já foi coletado e deixa um checkpoint para retomar depois
+            append_new_comments(st.session_state.comments_list)
+            flush_deferred_replies()
+            if st.session_state.next_page_token and not incremental_collection:
+                save_checkpoint(st.session_state.get('VIDEO_ID'), st.session_state.next_page_token, st.session_state.total_collected)
+            st.error(f"{e}. {st.session_state.total_collected} comments were saved; resume the collection after the quota resets.")
+            st.session_state.collecting = False
+            st.session_state.next_page_token = None
+            st.session_state.comments_list = []
+            st.session_state.pages_since_checkpoint = 0
+            render_client_stats()
+            return
+        except ApiError as e:
+            # A página falhou depois de todas as tentativas: não é o fim da coleta,
+            # então o checkpoint fica apontando para ela
+            append_new_comments(st.session_state.comments_list)
+            flush_deferred_replies()
+            if st.session_state.next_page_token and not incremental_collection:
+                save_checkpoint(st.session_state.get('VIDEO_ID'), st.session_state.next_page_token, st.session_state.total_collected)
+            st.error(f"{e}. {st.session_state.total_collected} comments were saved; click 'Resume Collection' to try again.")
+            st.session_state.collecting = False
+            st.session_state.next_page_token = None
+            st.session_state.comments_list = []
+            st.session_state.pages_since_checkpoint = 0
+            render_client_stats()
+            return
 
         if new_comments is not None:
             st.session_state.comments_list.extend(new_comments)
+            st.session_state.deferred_replies.extend(page_deferred)
             st.session_state.total_collected += len(new_comments)
             st.session_state.next_page_token = next_page
+            st.session_state.pages_since_checkpoint += 1
+
+            # No modo incremental, uma página só com ids conhecidos marca o fim dos novos
+            if incremental_collection and not new_comments:
+                next_page = None
 
             if next_page:
+                # Descarrega os lotes em disco e registra o ponto de retomada
+                if st.session_state.pages_since_checkpoint >= CHECKPOINT_EVERY:
+                    append_new_comments(st.session_state.comments_list)
+                    flush_deferred_replies()
+                    if not incremental_collection:
+                        save_checkpoint(st.session_state.get('VIDEO_ID'), next_page, st.session_state.total_collected)
+                    st.session_state.comments_list = []
+                    st.session_state.pages_since_checkpoint = 0
                 st.rerun()
             else:
                 append_new_comments(st.session_state.comments_list)
+                flush_deferred_replies()
+                if not incremental_collection:
+                    clear_checkpoint(st.session_state.get('VIDEO_ID'))
                 st.success(f"Collection finished! Collected and added {st.session_state.total_collected} new comments.")
+                complete_deferred_replies()
                 st.session_state.collecting = False
                 st.session_state.next_page_token = None
                 st.session_state.comments_list = []
+                st.session_state.pages_since_checkpoint = 0
         else:
             st.error("Could not retrieve comments. Check API Key and Video ID.")
             st.session_state.collecting = False
+
+    render_client_stats()
             
-    comments = load_existing_comments()
-    if comments:
-        json_string = json.dumps(comments, indent=2, ensure_ascii=False)
+    # Durante a coleta o arquivo só cresce; exporta apenas quando ela termina
+    if st.session_state.collecting:
+        return
+    json_string = comment_store.dumps_json_array(get_comments_file_path())
+    if json_string != "[]":
         download_name = f"comments_{st.session_state.get('VIDEO_ID', '')}.json" if st.session_state.get('VIDEO_ID') else "comments.json"
         st.download_button(
             label=" Download Collected Comments",
@@ -125,158 +250,85 @@ def comments_collect_visualization():
             mime="application/json"
         )
 
-def get_video_metadata(video_id, api_key):
-    """Coleta metadados do vídeo (visualizações, likes, etc)"""
-    video_url = f"https://www.googleapis.com/youtube/v3/videos?part=snippet,statistics&id={video_id}&key={api_key}"
-    video_response = requests.get(video_url)
-    video_data = video_response.json()
-    
-    if "items" not in video_data or len(video_data["items"]) == 0:
-        return None
-    
-    video_item = video_data["items"][0]
-    metadata = {
-        "video_id": video_id,
-        "title": video_item.get("snippet", {}).get("title", ""),
-        "viewCount": int(video_item.get("statistics", {}).get("viewCount", 0)),
-        "likeCount": int(video_item.get("statistics", {}).get("likeCount", 0)),
-        "commentCount": int(video_item.get("statistics", {}).get("commentCount", 0)),
-    }
-    return metadata
+def render_client_stats():
+    """Exibe as estatísticas de rede e de cota do cliente da API na página de coleta."""
+    # Orçamento da chave da sessão: outras chaves (e sessões com outras chaves) têm o seu
+    scheduler = get_client().get_scheduler(st.session_state.get('GOOGLE_API_KEY'))
+    quota = scheduler.get_stats()
+    with st.expander("Quota"):
+        col1, col2, col3 = st.columns(3)
+        col1.metric("Remaining quota", f"{quota['remaining']:,} units")
+        col2.metric("Used today", f"{quota['used']:,} units")
+        col3.metric("Deferred reply threads", quota["deferred_replies"])
+        budget = st.number_input("Daily quota budget (units)", min_value=1, value=int(quota["budget"]), step=1000)
+        rate = st.number_input("Max requests per second", min_value=0.1, value=float(scheduler.rate), step=1.0)
+        # Só aplica quando o usuário muda os valores; um rerun não sobrescreve a configuração de outra sessão
+        if (budget, rate) != st.session_state.get('quota_settings', (budget, rate)):
+            scheduler.configure(budget=budget, rate=rate)
+        st.session_state['quota_settings'] = (budget, rate)
 
-def save_video_metadata(metadata):
-    """Salva metadados do vídeo em arquivo"""
-    if metadata:
-        metadata_file = f"video_metadata_{metadata['video_id']}.json"
-        with open(metadata_file, 'w', encoding='utf-8') as f:
-            json.dump(metadata, f, ensure_ascii=False, indent=4)
+    stats = get_client().get_stats()
+    if not stats["requests"]:
+        return
+    with st.expander("Connection stats"):
+        col1, col2, col3, col4 = st.columns(4)
+        col1.metric("Requests", stats["requests"])
+        col2.metric("Retries", stats["retries"])
+        col3.metric("Downloaded", f"{stats['wire_bytes'] / 1048576:.2f} MB")
+        col4.metric("Avg latency", f"{stats['avg_latency_ms']:.0f} ms")
+        if stats["comments"]:
+            st.caption(
+                f"{stats['bytes_per_comment']:.0f} bytes/comment over the wire "
+                f"({stats['bytes'] / 1048576:.2f} MB decompressed) | "
+                f"{stats['avg_decode_ms']:.1f} ms JSON decode per request"
+            )
+        if stats["errors"]:
+            st.caption(f"{stats['errors']} failed requests")
 
-def get_video_comments_page(page_token):
-    """Coleta uma única página de comentários de vídeos regulares do YouTube."""
-    comments_list = []
+def get_video_comments_page(page_token, reply_workers=REPLY_WORKERS, skip_ids=None, deferred=None):
+    """Coleta uma única página de comentários do vídeo da sessão.
+    Na primeira página também coleta e salva os metadados do vídeo.
+    Threads com id em `skip_ids` (já armazenadas) são descartadas; as que
+    tiveram as respostas adiadas por falta de cota vão para `deferred`.
+    """
     api_key = st.session_state.get('GOOGLE_API_KEY')
     video_id = st.session_state.get('VIDEO_ID')
 
     if page_token is None:
-        video_url = f"https://www.googleapis.com/youtube/v3/videos?part=snippet,statistics&id={video_id}&key={api_key}"
-        video_response = requests.get(video_url)
-        video_data = video_response.json()
-        
-        if "items" not in video_data or len(video_data["items"]) == 0:
+        # Revalida os metadados (requisição condicional) no início da coleta
+        metadata = get_video_metadata(video_id, api_key, ttl=0)
+        if metadata is None:
             return None, None
-        
-        video_item = video_data["items"][0]
-        metadata = {
-            "video_id": video_id,
-            "title": video_item.get("snippet", {}).get("title", ""),
-            "viewCount": int(video_item.get("statistics", {}).get("viewCount", 0)),
-            "likeCount": int(video_item.get("statistics", {}).get("likeCount", 0)),
-            "commentCount": int(video_item.get("statistics", {}).get("commentCount", 0)),
-        }
-        save_video_metadata(metadata)
         st.session_state['video_metadata'] = metadata
 
-    def sanitize_message(text):
-        if not text:
-            return ""
-        unescaped = html.unescape(text)
-        unescaped = re.sub(r"<a\s+[^>]*>(.*?)</a>", r"\1", unescaped, flags=re.IGNORECASE)
-        return re.sub(r"<[^>]+>", "", unescaped).strip()
-
-    def fetch_all_replies(parent_comment_id, api_key_value):
-        replies = []
-        next_reply_token = None
-        while True:
-            replies_url = (
-                "https://www.googleapis.com/youtube/v3/comments"
-                f"?part=snippet&parentId={parent_comment_id}&maxResults=100&key={api_key_value}"
-            )
-            if next_reply_token:
-                replies_url += f"&pageToken={next_reply_token}"
-            replies_response = requests.get(replies_url)
-            replies_data = replies_response.json()
-            if "items" not in replies_data:
-                break
-            for reply in replies_data["items"]:
-                reply_snippet = reply["snippet"]
-                replies.append({
-                    "author": reply_snippet.get("authorDisplayName", ""),
-                    "message": sanitize_message(reply_snippet.get("textDisplay", "")),
-                    "likes": reply_snippet.get("likeCount", 0)
-                })
-            next_reply_token = replies_data.get("nextPageToken")
-            if not next_reply_token:
-                break
-        return replies
-
-    comments_url = f"https://www.googleapis.com/youtube/v3/commentThreads?part=snippet,replies&videoId={video_id}&maxResults=100&key={api_key}"
-    if page_token:
-        comments_url += f"&pageToken={page_token}"
-    
-    comments_response = requests.get(comments_url)
-    comments_data = comments_response.json()
-    
-    if "items" not in comments_data:
-        return [], None 
+    return fetch_comments_page(video_id, api_key, page_token, reply_workers, skip_ids, deferred)
 
-    for item in comments_data["items"]:
-        comment = item["snippet"]["topLevelComment"]["snippet"]
-        comment_id = item["snippet"]["topLevelComment"]["id"]
-        author = comment["authorDisplayName"]
-        message = sanitize_message(comment["textDisplay"])
-        likes = comment.get("likeCount", 0)
-        replies_count = item["snippet"].get("totalReplyCount", 0)
-        
-        replies_list = []
-        if replies_count > 0:
-            replies_list = fetch_all_replies(comment_id, api_key)
-        
-        comment_entry = {
-            "id": comment_id,
-            "author": author,
-            "message": message,
-            "likeCount": likes,
-            "replyCount": replies_count,
-            "replies": replies_list
-        }
-        comments_list.append(comment_entry)
-    
-    next_page_token = comments_data.get("nextPageToken")
-    return comments_list, next_page_token
+def flush_deferred_replies():
+    """Registra as threads com respostas adiadas das páginas já gravadas no store."""
+    add_deferred_replies(st.session_state.get('VIDEO_ID'), st.session_state.deferred_replies)
+    st.session_state.deferred_replies = []
 
-def load_video_metadata(video_id):
-    """Carrega metadados do vídeo do arquivo"""
-    metadata_file = f"video_metadata_{video_id}.json"
+def complete_deferred_replies():
+    """Busca as respostas adiadas do vídeo da sessão, se a cota permitir."""
     try:
-        with open(metadata_file, 'r', encoding='utf-8') as f:
-            return json.load(f)
-    except (FileNotFoundError, json.JSONDecodeError):
-        return None
+        with st.spinner("Fetching deferred replies..."):
+            remaining = expand_deferred_replies(
+                st.session_state.get('VIDEO_ID'), st.session_state.get('GOOGLE_API_KEY'), get_comments_file_path()
+            )
+    except (QuotaExceeded, ApiError) as e:
+        st.error(f"{e}. The remaining deferred replies can be fetched later with 'Fetch deferred replies'.")
+        return
+    if remaining:
+        st.warning(f"{remaining} threads still miss replies deferred to save quota. Click 'Fetch deferred replies' once more quota is available.")
 
 def load_existing_comments():
-    try:
-        file_path = get_comments_file_path()
-        with open(file_path, 'r', encoding='utf-8') as f:
-            if f.read(1):
-                f.seek(0)  # Volta para o início do arquivo
-                return json.load(f)
-            else:
-                return []  # Arquivo vazio
-    except (FileNotFoundError, json.JSONDecodeError):
-        return []  # Arquivo não encontrado ou corrompido
+    return comment_store.load_comments(get_comments_file_path())
 
 def save_comments(comments_list):
     file_path = get_comments_file_path()
-    with open(file_path, 'w', encoding='utf-8') as f:
-        json.dump(comments_list, f, ensure_ascii=False, indent=4)
+    comment_store.reset_store(file_path)
+    comment_store.append_comments(file_path, comments_list)
 
 def append_new_comments(new_comments):
-    existing_comments = load_existing_comments()
-    existing_ids = {comment.get('id') for comment in existing_comments if 'id' in comment}
-    
-    new_comments_filtered = [comment for comment in new_comments if comment['id'] not in existing_ids]
-    
-    existing_comments.extend(new_comments_filtered)
-    save_comments(existing_comments)
-    
-    return len(new_comments_filtered)  # Retorna a quantidade de novos comentários
\ No newline at end of file
+    # Custo proporcional à página adicionada, não ao tamanho do arquivo
+    return comment_store.append_comments(get_comments_file_path(), new_comments)  # Retorna a quantidade de novos comentários
\ No newline at end of file
@@ -0,0 +1,131 @@
+import json
+import os
+import threading
+import time
+from v1.client import get_client
+
+"""
+    Video metadata cache
+    Metadados de vídeo salvos em `video_metadata_<id>.json` com um índice
+    (`video_metadata_index.json`) por video_id contendo o ETag e a data da
+    última busca. Dentro do TTL nenhuma requisição é feita; depois dele a
+    busca é condicional (If-None-Match) e um 304 reaproveita o arquivo salvo.
+"""
+
+METADATA_TTL = 6 * 60 * 60  # Segundos até os metadados serem revalidados na API
+INDEX_FILE = "video_metadata_index.json"
+VIDEO_FIELDS = "etag,items(snippet(title),statistics(viewCount,likeCount,commentCount))"
+
+_indexes = {}  # diretório -> (mtime do índice, índice)
+_metadata = {}  # (diretório, video_id) -> (fetched_at do índice, metadados)
+_lock = threading.Lock()
+
+
+def get_metadata_path(video_id, directory=""):
+    return os.path.join(directory, f"video_metadata_{video_id}.json")
+
+
+def _load_index(directory):
+    index_path = os.path.join(directory, INDEX_FILE)
+    try:
+        mtime = os.path.getmtime(index_path)
+    except OSError:
+        return {}
+    cached = _indexes.get(directory)
+    if cached is not None and cached[0] == mtime:
+        return cached[1]
+    try:
+        with open(index_path, 'r', encoding='utf-8') as f:
+            index = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        index = {}
+    _indexes[directory] = (mtime, index)
+    return index
+
+
+def _save_index(directory, index):
+    index_path = os.path.join(directory, INDEX_FILE)
+    tmp_path = f"{index_path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(index, f, ensure_ascii=False, indent=4)
+    os.replace(tmp_path, index_path)
+    _indexes[directory] = (os.path.getmtime(index_path), index)
+
+
+def save_video_metadata(metadata, directory="", etag=None):
+    """Salva metadados do vídeo em arquivo e registra a entrada no índice"""
+    if not metadata:
+        return
+    video_id = metadata['video_id']
+    with _lock:
+        with open(get_metadata_path(video_id, directory), 'w', encoding='utf-8') as f:
+            json.dump(metadata, f, ensure_ascii=False, indent=4)
+        index = dict(_load_index(directory))
+        index[video_id] = {
+            "path": os.path.basename(get_metadata_path(video_id)),
+            "etag": etag,
+            "fetched_at": time.time(),
+        }
+        _save_index(directory, index)
+        _metadata[(directory, video_id)] = (index[video_id]["fetched_at"], metadata)
+
+
+def load_video_metadata(video_id, directory=""):
+    """Carrega metadados do vídeo do cache, sem acessar a API"""
+    if not video_id:
+        return None
+    key = (directory, video_id)
+    # A entrada do índice muda a cada busca, inclusive por outro processo (CLI)
+    fetched_at = _load_index(directory).get(video_id, {}).get("fetched_at")
+    cached = _metadata.get(key)
+    if cached is not None and cached[0] == fetched_at:
+        return cached[1]
+    try:
+        with open(get_metadata_path(video_id, directory), 'r', encoding='utf-8') as f:
+            metadata = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+    _metadata[key] = (fetched_at, metadata)
+    return metadata
+
+
+def _parse_video(video_id, data):
+    if "items" not in data or len(data["items"]) == 0:
+        return None
+    video_item = data["items"][0]
+    return {
+        "video_id": video_id,
+        "title": video_item.get("snippet", {}).get("title", ""),
+        "viewCount": int(video_item.get("statistics", {}).get("viewCount", 0)),
+        "likeCount": int(video_item.get("statistics", {}).get("likeCount", 0)),
+        "commentCount": int(video_item.get("statistics", {}).get("commentCount", 0)),
+    }
+
+
+def get_video_metadata(video_id, api_key, directory="", ttl=METADATA_TTL):
+    """Retorna os metadados do vídeo (visualizações, likes, etc).
+
+    Usa o cache enquanto a última busca tiver menos de `ttl` segundos;
+    caso contrário revalida na API com If-None-Match. Se a API falhar, os
+    metadados em cache continuam valendo. Retorna None se o vídeo não
+    existir.
+    """
+    entry = _load_index(directory).get(video_id)
+    cached = load_video_metadata(video_id, directory) if entry else None
+    if cached is not None and time.time() - entry.get("fetched_at", 0) < ttl:
+        return cached
+
+    headers = {"If-None-Match": entry["etag"]} if cached is not None and entry.get("etag") else None
+    params = {"part": "snippet,statistics", "id": video_id, "fields": VIDEO_FIELDS, "key": api_key}
+    status, data, response_headers = get_client().fetch("videos", params, headers=headers)
+
+    if (status is None or status >= 400) and cached is not None:
+        return cached  # API inacessível ou com erro: usa os metadados antigos
+    if status == 304:
+        save_video_metadata(cached, directory, etag=entry.get("etag"))
+        return cached
+
+    metadata = _parse_video(video_id, data)
+    if metadata is not None:
+        save_video_metadata(metadata, directory, etag=response_headers.get("ETag") or data.get("etag"))
+    return metadata
@@ -0,0 +1,149 @@
+import json
+import os
+import threading
+import time
+from datetime import datetime, timezone
+
+try:
+    from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+    try:
+        QUOTA_TIMEZONE = ZoneInfo("America/Los_Angeles")  # A cota diária da API reinicia à meia-noite do Pacífico
+    except ZoneInfoNotFoundError:
+        QUOTA_TIMEZONE = timezone.utc  # Sistema sem a base de fusos (tzdata)
+except ImportError:
+    QUOTA_TIMEZONE = timezone.utc
+
+# Custo estimado em unidades de cota de cada endpoint (métodos list custam 1 unidade)
+QUOTA_COSTS = {
+    "videos": 1,
+    "commentThreads": 1,
+    "comments": 1,
+    "playlistItems": 1,
+}
+DAILY_QUOTA = 10000
+REQUESTS_PER_SECOND = 10.0
+REPLY_RESERVE = 0.1  # Fração do orçamento abaixo da qual a expansão de respostas é adiada
+
+
+class QuotaExceeded(Exception):
+    """Lançada quando uma requisição ultrapassaria o orçamento diário de cota."""
+
+
+class QuotaScheduler:
+    """Controla o consumo estimado de cota e a taxa de requisições à API.
+
+    Cada chamada a `acquire` espera pelo próximo intervalo permitido pela
+    taxa configurada e debita o custo do endpoint do orçamento diário.
+    Quando `state_path` é informado o consumo é persistido, de forma que
+    execuções diferentes no mesmo dia compartilham o mesmo orçamento.
+    """
+
+    def __init__(self, budget=DAILY_QUOTA, rate=REQUESTS_PER_SECOND, reply_reserve=REPLY_RESERVE,
+                 costs=None, state_path=None):
+        self.budget = budget
+        self.rate = rate
+        self.reply_reserve = reply_reserve
+        self.costs = dict(QUOTA_COSTS, **(costs or {}))
+        self.state_path = state_path
+
+        self._lock = threading.Lock()
+        self._next_slot = 0.0
+        self._day = self._today()
+        self._used = 0
+        self._by_endpoint = {}
+        self._deferred_replies = 0
+        self._load_state()
+
+    def _today(self):
+        return datetime.now(QUOTA_TIMEZONE).date().isoformat()
+
+    def _load_state(self):
+        if not self.state_path:
+            return
+        try:
+            with open(self.state_path, 'r', encoding='utf-8') as f:
+                state = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return
+        if state.get("day") == self._day:
+            self._used = state.get("used", 0)
+            self._by_endpoint = state.get("by_endpoint", {})
+
+    def _save_state(self):
+        if not self.state_path:
+            return
+        tmp_path = f"{self.state_path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({"day": self._day, "used": self._used, "by_endpoint": self._by_endpoint}, f)
+        os.replace(tmp_path, self.state_path)
+
+    def _roll_day(self):
+        today = self._today()
+        if today != self._day:
+            self._day = today
+            self._used = 0
+            self._by_endpoint = {}
+            self._deferred_replies = 0
+
+    def configure(self, budget=None, rate=None):
+        with self._lock:
+            if budget is not None:
+                self.budget = budget
+            if rate is not None:
+                self.rate = rate
+
+    def remaining(self):
+        with self._lock:
+            self._roll_day()
+            return max(0, self.budget - self._used)
+
+    def can_spend(self, units):
+        return self.remaining() - units >= self.budget * self.reply_reserve
+
+    def record_deferred_replies(self, count):
+        with self._lock:
+            self._deferred_replies += count
+
+    def acquire(self, endpoint):
+        """Espera pelo próximo intervalo livre e debita o custo de `endpoint`.
+        Lança QuotaExceeded se o custo ultrapassar o orçamento restante."""
+        cost = self.costs.get(endpoint, 1)
+        with self._lock:
+            self._roll_day()
+            if self._used + cost > self.budget:
+                raise QuotaExceeded(f"Quota budget of {self.budget} units exhausted ({self._used} used today)")
+            self._used += cost
+            self._by_endpoint[endpoint] = self._by_endpoint.get(endpoint, 0) + cost
+            self._save_state()
+
+            now = time.monotonic()
+            slot = max(now, self._next_slot)
+            if self.rate:
+                self._next_slot = slot + 1.0 / self.rate
+        if slot > now:
+            time.sleep(slot - now)
+
+    def get_stats(self):
+        with self._lock:
+            self._roll_day()
+            return {
+                "budget": self.budget,
+                "used": self._used,
+                "remaining": max(0, self.budget - self._used),
+                "by_endpoint": dict(self._by_endpoint),
+                "deferred_replies": self._deferred_replies,
+            }
+
+
+_schedulers = {}  # chave da API -> QuotaScheduler
+_scheduler_lock = threading.Lock()
+
+
+def get_scheduler(api_key=None):
+    """Retorna o agendador de cota da chave `api_key`. A cota pertence à
+    chave (ao projeto do Google), então sessões e threads que usam a mesma
+    chave compartilham o orçamento, e chaves diferentes não."""
+    with _scheduler_lock:
+        if api_key not in _schedulers:
+            _schedulers[api_key] = QuotaScheduler()
+        return _schedulers[api_key]
@@ -1,5 +1,6 @@
 import json
 from v2.output.counts.scream_index_counts import scream_index_mean
+from v2.data.author_index import get_author_index, get_author_rows
 import streamlit as st
 import plotly.graph_objects as go
 
@@ -41,14 +42,15 @@ def scream_index_page():
         return fig
 
     st.title('Scream Index Analysis')
+    data = st.session_state['comments_dataset']
     st.plotly_chart(create_gauge_chart(
         "Scream Index Mean",
-        scream_index_mean(st.session_state['comments_file'])
+        scream_index_mean(data)
     ), use_container_width=True)
-    
+
+    scream_indices = data.rows_above('scream_index', 0.70)
+
     with st.expander("Messages above 0.7 on Scream Index", expanded=True):
-        data = st.session_state['comments_file']
-        scream_indices = [obj for obj in data if obj.get('scream_index', 0) > 0.70]
         st.dataframe(
             data=scream_indices,
             use_container_width=True
@@ -56,20 +58,11 @@ def scream_index_page():
 
     st.title('Top Authors by Scream Index')
 
-    data = st.session_state['comments_file']
-    commenters = {}
-    scream_indices = [obj for obj in data if obj.get('scream_index', 0) > 0.70]
-    for obj in scream_indices:
-        commenter = obj.get('author', 'Unknown')
-        if commenter not in commenters:
-            commenters[commenter] = []
-        commenters[commenter].append(obj)
-    sorted_commenters = sorted(commenters.items(), key=lambda x: len(x[1]), reverse=True)
-    top_commenters = sorted_commenters[:10]
-    for commenter, comments in top_commenters:
-        st.write(f"{commenter}: {len(comments)} comments")
+    authors = get_author_index(data)
+    screaming = data.column('scream_index', 0.0).to_numpy() > 0.70
+    for commenter, count in authors.top(10, mask=screaming):
+        st.write(f"{commenter}: {count} comments")
         with st.expander(f"Comments by {commenter}", expanded=False):
-            for comment in comments:
-                st.write(f"- {comment.get('message', 'No content')} (Scream Index: {comment.get('scream_index', 0)})")
-    
-    
\ No newline at end of file
+            comments = data.frame.iloc[get_author_rows(data, commenter, mask=screaming)]
+            for message, scream_index in zip(comments['message'], comments['scream_index']):
+                st.write(f"- {message or 'No content'} (Scream Index: {scream_index})")
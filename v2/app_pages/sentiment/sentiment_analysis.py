@@ -1,4 +1,3 @@
-import json
 import streamlit as st
 from v2.output.charts.sentiment_types_chart import create_sentiment_types_chart
 from v2.output.counts.sentiment_type_counts import count_sentiment_types
@@ -6,13 +5,9 @@ from v2.output.charts.negativity_gauge_meter import create_negativity_gauge
 
 def load_and_process_data():
     """
-    Loads the JSON and returns the data
+    Returns the comments dataset loaded in the session (or None)
     """
-    try:
-        return st.session_state['comments_file']
-    except (FileNotFoundError, json.JSONDecodeError) as e:
-        st.error(f"Erro ao carregar dados: {e}")
-        return []
+    return st.session_state.get('comments_dataset')
 
 def sentiment_analysis_page():
     """
@@ -20,7 +15,6 @@ def sentiment_analysis_page():
     This function sets up the Streamlit page configuration and sidebar selection for sentiment types analysis.
     """
     data = load_and_process_data()
-    st.session_state['comments_file'] = data
     
     st.title('Sentiment Analysis using Pysentimiento')
 
@@ -30,7 +24,7 @@ def sentiment_analysis_page():
             return
 
         total_comments = len(data)
-        negative_comments = sum(1 for c in data if c.get('sentiment') == 'NEG')
+        negative_comments = int((data.column('sentiment') == 'NEG').sum())
         negativity_percentage = (negative_comments / total_comments) * 100 if total_comments > 0 else 0
 
         # Cria e exibe o gauge       
@@ -51,21 +45,19 @@ def sentiment_analysis_page():
     st.subheader("Comments by Sentiment")
 
     def render_sentiment_comments(sentiment_name, sentiment_label):
-        filtered_comments = [c for c in data if c.get("sentiment") == sentiment_label]
+        filtered_comments = data.rows_equal('sentiment', sentiment_label)
         show_all_key = f"show_all_sentiment_{sentiment_name}"
 
         if show_all_key not in st.session_state:
             st.session_state[show_all_key] = False
 
         st.write(f"Found {len(filtered_comments)} comments.")
-        if not filtered_comments:
+        if filtered_comments.empty:
             st.info("No comments found for this sentiment.")
             return
 
-        comments_to_show = filtered_comments if st.session_state[show_all_key] else filtered_comments[:5]
-        for comment in comments_to_show:
-            author = comment.get("author", "")
-            message = comment.get("message", "")
+        comments_to_show = filtered_comments if st.session_state[show_all_key] else filtered_comments.head(5)
+        for author, message in zip(comments_to_show['author'], comments_to_show['message']):
             st.write(f"- **{author}**: {message}")
 
         hidden_count = len(filtered_comments) - 5
@@ -3,7 +3,8 @@ from v2.output.charts.toxic_types_chart import create_toxic_types_chart
 from v2.output.counts.all_toxic_type_count import get_all_toxic_type_count
 from v2.output.counts.toxic_type_counts import count_toxic_types
 from v2.output.filter.toxic_types_filter import toxic_types_filter
-from v2.output.wordclouds.wordcloud import gerar_nuvem_palavras
+from v2.output.wordclouds.wordcloud import WORDCLOUD_PROFILES
+from v2.output.wordclouds.wordcloud_jobs import get_toxic_cloud, prerender_toxic_clouds
 import plotly.graph_objects as go
 import streamlit as st
 
@@ -12,7 +13,7 @@ def toxic_types_page():
     Returns page for toxic types analysis.
     This function sets up the Streamlit page configuration and sidebar selection for toxic types analysis.
     """
-    data = st.session_state['comments_file']
+    data = st.session_state['comments_dataset']
 
     def create_gauge_chart(title, value):
         fig = go.Figure(go.Indicator(
@@ -66,14 +67,24 @@ def toxic_types_page():
     with st.expander(f'{toxic_type} Wordclouds', expanded=True):
         st.write(f'Wordclouds for {toxic_type} will be displayed here.')
         toxic_data = toxic_types_filter(data, toxic_type)
-        if(toxic_data.__len__() == 0):
+        if(len(toxic_data) == 0):
             st.warning(f'No data found for {toxic_type}.')
             return
-        gerar_nuvem_palavras(toxic_data, toxic_type)
+        profile = st.radio(
+            'Resolution', list(WORDCLOUD_PROFILES), horizontal=True, key='toxic_cloud_profile',
+            format_func=lambda name: f"{name} ({WORDCLOUD_PROFILES[name]['width']}x{WORDCLOUD_PROFILES[name]['height']})"
+        )
+        # As nuvens dos sete tipos são geradas em segundo plano; trocar de tipo só lê o cache
+        prerender_toxic_clouds(data)
+        image = get_toxic_cloud(data, toxic_type, profile)
+        if image is None:
+            st.warning(f'Not enough words to generate the {toxic_type} wordcloud.')
+            return
         st.image(
-            f'v2/output/wordclouds/images/nuvem_palavras{toxic_type}.png',
+            image,
             caption=f'Wordcloud for {toxic_type}',
             use_container_width=True
         )
+        st.download_button('Download PNG', image, file_name=f'wordcloud_{toxic_type}_{profile}.png', mime='image/png')
         
     
\ No newline at end of file
@@ -0,0 +1,83 @@
+import numpy as np
+import pandas as pd
+
+"""
+    Author index
+    Índice autor -> linhas do dataset (com contagens e soma de likes),
+    construído uma vez por dataset e usado pelos Top Authors, pelo
+    detalhamento por autor e pelos autores do Scream Index, em vez de uma
+    varredura do dataset por autor. Com o banco SQLite ligado ao dataset,
+    as linhas de um autor vêm do índice de autor do banco.
+"""
+
+UNKNOWN_AUTHOR = "Unknown"  # Nome usado para comentários sem autor
+
+
+class AuthorIndex:
+    """Linhas de cada autor em formato CSR sobre os códigos da coluna
+    categórica `author`: `_rows[_indptr[i]:_indptr[i + 1]]` são as linhas,
+    em ordem, do autor `authors[i]`."""
+
+    def __init__(self, frame):
+        author = frame['author']
+        self.authors = author.cat.categories
+        self.codes = author.cat.codes.to_numpy().astype(np.int32)  # int8/int16 não comportam a categoria extra
+        # Comentários sem autor (código -1) ficam agrupados em UNKNOWN_AUTHOR
+        missing = self.codes < 0
+        if missing.any():
+            if UNKNOWN_AUTHOR not in self.authors:
+                self.authors = self.authors.append(pd.Index([UNKNOWN_AUTHOR]))
+            self.codes[missing] = self.authors.get_loc(UNKNOWN_AUTHOR)
+        self.has_message = (frame['message'].fillna("").str.strip() != "").to_numpy()
+
+        self._rows = np.argsort(self.codes, kind='stable').astype(np.int32)
+        self._indptr = np.concatenate(([0], np.cumsum(np.bincount(self.codes, minlength=len(self.authors)))))
+        self.like_sums = np.bincount(
+            self.codes, weights=frame['likeCount'].to_numpy(), minlength=len(self.authors)
+        ).astype(np.int64) if 'likeCount' in frame.columns else np.zeros(len(self.authors), dtype=np.int64)
+
+    def _mask(self, mask):
+        return self.has_message if mask is None else mask
+
+    def top(self, n, mask=None):
+        """Os `n` autores com mais linhas em `mask` (padrão: comentários com
+        texto), como [(autor, quantidade)]."""
+        codes = self.codes[self._mask(mask)]
+        counts = np.bincount(codes, minlength=len(self.authors))
+        # Autores na ordem de aparição; a ordenação estável desempata como o Counter
+        candidates = pd.unique(codes)
+        order = candidates[np.argsort(-counts[candidates], kind='stable')][:n]
+        return [(self.authors[i], int(counts[i])) for i in order]
+
+    def rows_of(self, author, mask=None):
+        """Posições das linhas de `author` que estão em `mask` (padrão: comentários com texto)."""
+        try:
+            i = self.authors.get_loc(author)
+        except KeyError:
+            return np.empty(0, dtype=np.int32)
+        rows = self._rows[self._indptr[i]:self._indptr[i + 1]]
+        return rows[self._mask(mask)[rows]]
+
+    def like_sum(self, author):
+        try:
+            return int(self.like_sums[self.authors.get_loc(author)])
+        except KeyError:
+            return 0
+
+
+def get_author_index(dataset):
+    """Índice de autores do dataset, construído na primeira chamada."""
+    return dataset.cached('author_index', lambda data: AuthorIndex(data.frame))
+
+
+def get_author_rows(dataset, author, mask=None):
+    """Posições das linhas de `author` em `mask` (padrão: comentários com
+    texto). Com `dataset.store`, a busca usa o índice de autor do SQLite."""
+    index = get_author_index(dataset)
+    if dataset.store is None:
+        return index.rows_of(author, mask)
+    # Sem autor no banco é NULL; no índice, UNKNOWN_AUTHOR
+    rows = np.asarray(
+        dataset.store.rows_equal('author', author, or_null=author == UNKNOWN_AUTHOR), dtype=np.int32
+    )
+    return rows[index._mask(mask)[rows]]
@@ -0,0 +1,278 @@
+import hashlib
+import json
+import threading
+import numpy as np
+import pandas as pd
+
+TOXIC_TYPES = [
+    'toxicity',
+    'severe_toxicity',
+    'obscene',
+    'identity_attack',
+    'insult',
+    'threat',
+    'sexual_explicit'
+]
+SCORE_COLUMNS = TOXIC_TYPES + ['sentiment_score', 'scream_index']
+COUNT_COLUMNS = ['likeCount', 'replyCount']
+CATEGORY_COLUMNS = ['author', 'sentiment', 'parent_id']
+REPLY_COLUMNS = ['parent_row', 'depth', 'is_reply', 'parent_id']  # Colunas internas das respostas achatadas
+
+try:
+    import pyarrow  # noqa: F401
+    STRING_DTYPE = "string[pyarrow]"
+except ImportError:
+    STRING_DTYPE = "string"
+
+
+def _flatten_replies(frame):
+    """Move as respostas aninhadas em `replies` para linhas próprias, no fim
+    da tabela, ligadas ao comentário pai por `parent_row` (posição) e
+    `parent_id` (id do comentário, quando existe)."""
+    replies = frame.pop('replies')
+    nested = [(row, reply_list) for row, reply_list in enumerate(replies) if isinstance(reply_list, list) and reply_list]
+    if not nested:
+        return frame
+
+    reply_frame = pd.DataFrame.from_records([reply for _, reply_list in nested for reply in reply_list])
+    if 'likeCount' not in reply_frame.columns and 'likes' in reply_frame.columns:
+        reply_frame = reply_frame.rename(columns={'likes': 'likeCount'})
+    parent_rows = np.fromiter((row for row, reply_list in nested for _ in reply_list), dtype='int32', count=len(reply_frame))
+    reply_frame['parent_row'] = parent_rows
+    reply_frame['depth'] = 1
+    reply_frame['is_reply'] = True
+    if 'id' in frame.columns:
+        reply_frame['parent_id'] = frame['id'].to_numpy()[parent_rows]
+    frame['is_reply'] = False  # Os dois lados booleanos: a concatenação não cai em object
+    return pd.concat([frame, reply_frame], ignore_index=True)
+
+
+def _normalize(frame):
+    """Aplica os tipos colunares do dataset a um DataFrame de comentários."""
+    frame = frame.reset_index(drop=True)
+    if 'likeCount' not in frame.columns and 'likes' in frame.columns:
+        frame = frame.rename(columns={'likes': 'likeCount'})
+    if 'replies' in frame.columns:
+        frame = _flatten_replies(frame)
+
+    # Comentários de topo: parent_row -1 e depth 0
+    for name, default, dtype in (('parent_row', -1, 'int32'), ('depth', 0, 'int8')):
+        if name in frame.columns:
+            frame[name] = pd.to_numeric(frame[name], errors='coerce').fillna(default).astype(dtype)
+        else:
+            frame[name] = np.full(len(frame), default, dtype=dtype)
+    if 'is_reply' in frame.columns:
+        # Via booleano nulável: fillna em object (ex.: vindo do SQLite) avisa de downcast no pandas 2.2
+        frame['is_reply'] = frame['is_reply'].astype('boolean').fillna(False).astype(bool)
+    else:
+        frame['is_reply'] = False
+
+    # Sem autor fica ausente (NaN) mesmo quando nenhum comentário do lote tem o campo
+    if 'author' not in frame.columns:
+        frame['author'] = None
+    if 'message' not in frame.columns:
+        frame['message'] = ""
+    frame['message'] = frame['message'].fillna("").astype(STRING_DTYPE)
+
+    for name in CATEGORY_COLUMNS:
+        if name in frame.columns:
+            frame[name] = frame[name].astype('category')
+    for name in COUNT_COLUMNS:
+        if name in frame.columns:
+            frame[name] = pd.to_numeric(frame[name], errors='coerce').fillna(0).astype('int32')
+    for name in SCORE_COLUMNS:
+        if name in frame.columns:
+            frame[name] = pd.to_numeric(frame[name], errors='coerce').astype('float32')
+    return frame
+
+
+def _fingerprint(dataset):
+    # Colunas em ordem de nome: o mesmo conteúdo reaberto do SQLite (outra ordem) tem o mesmo hash
+    columns = sorted(dataset.frame.columns)
+    digest = hashlib.sha256(repr(columns).encode('utf-8'))
+    for name in columns:
+        column = dataset.frame[name]
+        if isinstance(column.dtype, pd.StringDtype):
+            # Texto concatenado é ~3x mais rápido que o hash por linha do pandas
+            digest.update(column.isna().to_numpy().tobytes())
+            digest.update("\x1f".join(column.fillna("").tolist()).encode('utf-8', 'surrogatepass'))
+            continue
+        try:
+            hashes = pd.util.hash_pandas_object(column, index=False)
+        except TypeError:
+            hashes = pd.util.hash_pandas_object(column.astype(str), index=False)  # Listas/dicts
+        digest.update(hashes.to_numpy().tobytes())
+    return digest.hexdigest()
+
+
+class CommentDataset:
+    """Dataset colunar de comentários compartilhado por todas as páginas.
+
+    É construído uma vez no upload e guardado em
+    `st.session_state['comments_dataset']`. Autor e sentimento são
+    categóricos, a mensagem usa strings Arrow, likes/replies são inteiros e
+    os scores de toxicidade, sentimento e scream_index são float32. A
+    conversão para lista de dicts só acontece na exportação.
+
+    Respostas são linhas da mesma tabela (`is_reply`, `depth`, `parent_row`,
+    `parent_id`), então classificação, contagens e nuvens de palavras as
+    processam junto com os comentários de topo.
+
+    `store` é o banco SQLite opcional (v2.data.comment_db) com as mesmas
+    linhas; quando presente, os detalhamentos por autor usam o índice de
+    autor do banco (v2.data.author_index.get_author_rows).
+    """
+
+    def __init__(self, frame):
+        self.frame = _normalize(frame)
+        self.store = None
+        self._cache = {}
+        self._locks = {}  # nome -> Lock da construção daquela estrutura
+        self._locks_lock = threading.Lock()
+
+    @classmethod
+    def from_records(cls, records):
+        return cls(pd.DataFrame.from_records(records))
+
+    def __len__(self):
+        return len(self.frame)
+
+    def has_column(self, name):
+        return name in self.frame.columns
+
+    def column(self, name, default=None):
+        """Retorna a coluna `name` ou uma Series preenchida com `default`."""
+        if name in self.frame.columns:
+            return self.frame[name]
+        return pd.Series(default, index=self.frame.index)
+
+    def rows_equal(self, column, value):
+        """Linhas com `column` igual a `value`."""
+        return self.frame[self.column(column) == value]
+
+    def rows_above(self, column, threshold):
+        """Linhas com `column` maior que `threshold`."""
+        if not self.has_column(column):
+            return self.frame.iloc[0:0]
+        return self.frame[self.frame[column] > threshold]
+
+    def cached(self, name, build):
+        """Estrutura derivada do dataset (índices, agregados), construída uma
+        vez por `build(dataset)` e reaproveitada nas próximas execuções.
+
+        Seguro entre threads (a página e a renderização em segundo plano): se
+        duas pedirem a mesma estrutura, a segunda espera a primeira construir.
+        """
+        if name in self._cache:
+            return self._cache[name]
+        with self._locks_lock:
+            lock = self._locks.setdefault(name, threading.Lock())
+        with lock:
+            if name not in self._cache:
+                self._cache[name] = build(self)
+        return self._cache[name]
+
+    def fingerprint(self):
+        """Hash do conteúdo (colunas e valores): o mesmo arquivo gera o mesmo
+        fingerprint em qualquer upload ou sessão."""
+        return self.cached('fingerprint', _fingerprint)
+
+    def top_level(self):
+        """Só os comentários de topo (sem as respostas)."""
+        return self.frame[~self.frame['is_reply']]
+
+    def replies_of(self, rows):
+        """Respostas dos comentários nas posições `rows`."""
+        return self.frame[self.frame['parent_row'].isin(rows)]
+
+    def to_records(self, index=None, nested=False):
+        """Converte para lista de dicts, omitindo campos ausentes (NaN).
+
+        `index` restringe a conversão a essas linhas (rótulos do frame), uma
+        por linha. Com `nested=True` o dataset inteiro volta ao formato do
+        coletor: só os comentários de topo, cada um com suas respostas em
+        `replies` (com `likes` em vez de `likeCount`), sem as colunas internas.
+        """
+        if nested:
+            return self._nested_records()
+        frame = self.frame if index is None else self.frame.loc[index]
+        return _records(frame)
+
+    def _nested_records(self):
+        is_reply = self.frame['is_reply'].to_numpy()
+        top_level = self.frame[~is_reply]
+        replies = self.frame[is_reply]
+        records = _records(top_level.drop(columns=REPLY_COLUMNS, errors='ignore'))
+        # Arquivos do coletor trazem replyCount e `replies` (vazio) em todo comentário
+        if replies.empty and not self.has_column('replyCount'):
+            return records
+
+        position = dict(zip(top_level.index, range(len(records))))
+        for record in records:
+            record['replies'] = []
+        # replyCount das respostas é só o preenchimento (0) da normalização
+        reply_frame = replies.drop(columns=REPLY_COLUMNS + ['replyCount'], errors='ignore')
+        reply_records = _records(reply_frame.rename(columns={'likeCount': 'likes'}))
+        for parent_row, reply in zip(replies['parent_row'], reply_records):
+            records[position[parent_row]]['replies'].append(reply)
+        return records
+
+    def to_json(self, indent=2):
+        """JSON no formato do coletor (respostas aninhadas em `replies`)."""
+        return json.dumps(self.to_records(nested=True), ensure_ascii=False, indent=indent, default=_json_default)
+
+
+def _export_scores(frame):
+    """Scores float32 voltam a float64 pelo menor decimal que os representa
+    (0.7 em vez de 0.699999988), o mesmo valor do arquivo de entrada."""
+    scores = [name for name in SCORE_COLUMNS if name in frame.columns and frame[name].dtype == np.float32]
+    if not scores:
+        return frame
+    frame = frame.copy()
+    for name in scores:
+        frame[name] = _shortest_float64(frame[name].to_numpy())
+    return frame
+
+
+def _shortest_float64(values):
+    """Para cada float32, o float64 com o menor número de algarismos
+    significativos (6 a 9) que volta ao mesmo float32."""
+    exact = values.astype(np.float64)
+    result = exact.copy()
+    pending = np.isfinite(exact) & (exact != 0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        exponent = np.floor(np.log10(np.abs(exact), where=pending, out=np.zeros_like(exact)))
+    # Potências de 10 só são exatas até 1e22; valores extremos (raros) vão pela string
+    extreme = pending & ((exponent < -13) | (exponent > 13))
+    result[extreme] = values[extreme].astype(str).astype(np.float64)
+    pending &= ~extreme
+    for digits in range(6, 10):
+        if not pending.any():
+            break
+        scale = 10.0 ** (digits - 1 - exponent[pending])
+        rounded = np.rint(exact[pending] * scale) / scale
+        matches = rounded.astype(np.float32) == values[pending]
+        positions = np.flatnonzero(pending)[matches]
+        result[positions] = rounded[matches]
+        pending[positions] = False
+    return result
+
+
+def _records(frame):
+    frame = _export_scores(frame)
+    return [
+        {key: value for key, value in record.items() if not is_missing(value)}
+        for record in frame.to_dict(orient='records')
+    ]
+
+
+def _json_default(value):
+    if isinstance(value, np.generic):
+        return value.item()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def is_missing(value):
+    if isinstance(value, (list, dict)):
+        return False  # Listas (ex.: replies) não são valores ausentes
+    return bool(pd.isna(value))
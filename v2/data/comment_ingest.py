@@ -0,0 +1,173 @@
+import gzip
+import os
+import ijson
+import numpy as np
+import pandas as pd
+from pandas.api.types import union_categoricals
+from v2.data.comment_dataset import CommentDataset
+
+"""
+    Streaming comment ingestion
+    Constrói o CommentDataset a partir do arquivo enviado sem carregar o
+    conteúdo inteiro como string nem como lista de dicts: os comentários são
+    lidos um a um (array JSON, JSONL ou as versões .gz) e convertidos para o
+    formato colunar em lotes de BATCH_SIZE.
+"""
+
+BATCH_SIZE = 50000  # Comentários convertidos para colunas por vez
+MAX_DATASET_MB = 2048  # Teto de memória do dataset em MB
+GZIP_MAGIC = b'\x1f\x8b'
+PEEK_SIZE = 4096  # Bytes lidos para descobrir o formato do arquivo
+RECORD_OVERHEAD = 5  # Memória de um comentário como dict Python por byte de JSON
+CHECK_EVERY = 1000  # Comentários lidos entre verificações do teto de memória
+
+
+class DatasetTooLarge(Exception):
+    pass
+
+
+def _stream_size(file_obj):
+    """Tamanho do arquivo (UploadedFile expõe `size`; arquivos comuns, via seek)."""
+    size = getattr(file_obj, 'size', None)
+    if size is not None:
+        return size
+    position = file_obj.tell()
+    size = file_obj.seek(0, os.SEEK_END)
+    file_obj.seek(position)
+    return size
+
+
+def _open_binary(file_obj):
+    """Retorna o fluxo de bytes descomprimido e o offset do primeiro caractere JSON."""
+    file_obj.seek(0)
+    is_gzip = file_obj.read(2) == GZIP_MAGIC
+    file_obj.seek(0)
+    # GzipFile não fecha o arquivo enviado ao ser descartado
+    stream = gzip.GzipFile(fileobj=file_obj, mode='rb') if is_gzip else file_obj
+
+    head = stream.read(PEEK_SIZE)
+    start = 3 if head.startswith(b'\xef\xbb\xbf') else 0  # BOM do UTF-8
+    while start < len(head) and head[start:start + 1].isspace():
+        start += 1
+    stream.seek(start)
+    return stream, head[start:start + 1]
+
+
+def _items(stream, first_char):
+    if not first_char:
+        return
+    if first_char == b'[':
+        yield from ijson.items(stream, 'item', use_float=True)
+    else:
+        yield from ijson.items(stream, '', multiple_values=True, use_float=True)
+
+
+def iter_records(file_obj):
+    """Itera os comentários de um array JSON ou JSONL (opcionalmente gzip)."""
+    yield from _items(*_open_binary(file_obj))
+
+
+def _match_categories(parts):
+    """Partes de uma coluna categórica prontas para o union_categoricals, que
+    exige o mesmo tipo de categorias: lotes sem a coluna (ou sem nenhum valor
+    nela) viram categóricos vazios com o tipo de categorias dos demais."""
+    parts = [part if isinstance(part.dtype, pd.CategoricalDtype) else part.astype('category') for part in parts]
+    filled = [part.cat.categories for part in parts if len(part.cat.categories)]
+    empty = (filled[0] if filled else parts[0].cat.categories)[:0]
+    return [
+        part if len(part.cat.categories)
+        else pd.Categorical.from_codes(np.full(len(part), -1, dtype=np.int8), categories=empty)
+        for part in parts
+    ]
+
+
+def _merge_frames(frames):
+    """Concatena os lotes coluna a coluna, liberando cada coluna dos lotes
+    assim que ela é copiada: o pico fica no tamanho do resultado mais uma
+    coluna, em vez de duas cópias do dataset. Colunas categóricas são unidas
+    sem passar por object."""
+    columns = list(dict.fromkeys(name for frame in frames for name in frame.columns))
+    lengths = [len(frame) for frame in frames]
+    merged = {}
+    for name in columns:
+        parts = [
+            frame.pop(name) if name in frame.columns else pd.Series([None] * length, dtype=object)
+            for frame, length in zip(frames, lengths)
+        ]
+        if any(isinstance(part.dtype, pd.CategoricalDtype) for part in parts):
+            merged[name] = pd.Series(union_categoricals(_match_categories(parts), ignore_order=True))
+        else:
+            merged[name] = pd.concat(parts, ignore_index=True)
+        del parts
+    return pd.DataFrame(merged, copy=False)
+
+
+def read_comments_dataset(file_obj, progress=None, max_mb=MAX_DATASET_MB, batch_size=BATCH_SIZE):
+    """Lê `file_obj` em streaming e retorna o CommentDataset.
+
+    O teto de memória conta os lotes já convertidos, o lote pendente
+    (estimado pelos bytes de JSON lidos) e, antes da junção final, a cópia
+    que ela produz.
+
+    Args:
+        file_obj: arquivo binário com seek (ex.: UploadedFile do Streamlit)
+        progress (callable): chamado com (bytes lidos, bytes totais) a cada lote
+        max_mb (int): teto de memória do dataset; acima dele a leitura é abortada
+        batch_size (int): comentários acumulados antes de virarem colunas
+
+    Raises:
+        DatasetTooLarge: se o dataset passar de `max_mb`
+        ValueError: se o conteúdo não for JSON válido
+    """
+    total_bytes = _stream_size(file_obj)
+    max_bytes = max_mb * 1024 * 1024
+    frames = []
+    used_bytes = 0
+    batch = []
+
+    def check_memory(extra_bytes=0):
+        if used_bytes + extra_bytes > max_bytes:
+            raise DatasetTooLarge(
+                f"Dataset exceeds the {max_mb} MB memory limit after {sum(len(f) for f in frames) + len(batch):,} comments"
+            )
+
+    def flush():
+        nonlocal used_bytes, batch_start
+        frame = CommentDataset.from_records(batch).frame
+        batch.clear()
+        batch_start = stream.tell()
+        # parent_row das respostas é relativo ao lote; desloca para a posição no dataset final
+        offset = sum(len(f) for f in frames)
+        frame['parent_row'] = frame['parent_row'].where(frame['parent_row'] < 0, frame['parent_row'] + offset)
+        frames.append(frame)
+        used_bytes += int(frame.memory_usage(deep=True).sum())
+        check_memory()
+        if progress is not None:
+            progress(min(file_obj.tell(), total_bytes), total_bytes)
+
+    try:
+        stream, first_char = _open_binary(file_obj)
+        batch_start = stream.tell()
+        for record in _items(stream, first_char):
+            batch.append(record)
+            if len(batch) >= batch_size:
+                flush()
+            elif len(batch) % CHECK_EVERY == 0:
+                # Lote pendente: dicts Python ocupam ~RECORD_OVERHEAD vezes o JSON lido
+                check_memory((stream.tell() - batch_start) * RECORD_OVERHEAD)
+        if batch:
+            flush()
+    except (ijson.JSONError, gzip.BadGzipFile, EOFError) as e:
+        raise ValueError(f"Invalid comments file: {e}") from e
+
+    if not frames:
+        return CommentDataset.from_records([])
+    if len(frames) == 1:
+        return CommentDataset(frames[0])
+    # A junção libera os lotes coluna a coluna; o pico é o resultado mais a maior coluna
+    columns = {name for f in frames for name in f.columns}
+    largest_column = max(sum(int(f[name].memory_usage(deep=True)) for f in frames if name in f.columns) for name in columns)
+    check_memory(largest_column)
+    frame = _merge_frames(frames)
+    frames.clear()
+    return CommentDataset(frame)
@@ -0,0 +1,99 @@
+import hashlib
+import json
+import os
+import threading
+from importlib import metadata
+import pandas as pd
+
+"""
+    Enrichment cache
+    Resultados da classificação (toxicidade, sentimento e scream_index)
+    salvos em disco em Parquet, endereçados pelo conteúdo: a chave é o hash
+    das mensagens do dataset junto com os identificadores e versões dos
+    modelos. Reenviar um arquivo já classificado restaura as colunas sem
+    rodar os modelos de novo. O tamanho total do cache é limitado a
+    MAX_CACHE_MB, removendo primeiro as entradas usadas há mais tempo (LRU
+    pela data de modificação, atualizada a cada leitura).
+"""
+
+CACHE_DIR = os.path.join(".cache", "enrichment")
+MAX_CACHE_MB = 1024  # Tamanho máximo do cache em disco
+CACHE_SUFFIX = ".parquet"
+
+_lock = threading.Lock()
+
+
+def package_version(name):
+    """Versão instalada de `name` (ou "unknown")."""
+    try:
+        return metadata.version(name)
+    except metadata.PackageNotFoundError:
+        return "unknown"
+
+
+def content_hash(messages):
+    """Hash das mensagens, na ordem do dataset."""
+    row_hashes = pd.util.hash_pandas_object(messages.fillna("").astype(str), index=False)
+    return hashlib.sha256(row_hashes.to_numpy().tobytes()).hexdigest()
+
+
+def get_enrichment_key(messages, models):
+    """Chave do cache para `messages` enriquecidas por `models`
+    (dict nome -> identificador e versão)."""
+    payload = json.dumps({"content": content_hash(messages), "models": models}, sort_keys=True)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def get_cache_path(key, directory=CACHE_DIR):
+    return os.path.join(directory, f"{key}{CACHE_SUFFIX}")
+
+
+def load_enrichment(key, directory=CACHE_DIR):
+    """Colunas enriquecidas salvas com `key`, ou None."""
+    path = get_cache_path(key, directory)
+    try:
+        frame = pd.read_parquet(path)
+    except (FileNotFoundError, OSError, ValueError):
+        return None
+    try:
+        os.utime(path)  # Marca a entrada como usada recentemente
+    except OSError:
+        pass
+    return frame
+
+
+def save_enrichment(key, frame, directory=CACHE_DIR, max_mb=MAX_CACHE_MB):
+    """Salva `frame` (só as colunas enriquecidas) e aplica o limite de tamanho."""
+    os.makedirs(directory, exist_ok=True)
+    path = get_cache_path(key, directory)
+    tmp_path = f"{path}.tmp"
+    frame.reset_index(drop=True).to_parquet(tmp_path, index=False)
+    os.replace(tmp_path, path)
+    evict(directory, max_mb, keep=path)
+
+
+def evict(directory=CACHE_DIR, max_mb=MAX_CACHE_MB, keep=None):
+    """Remove as entradas menos usadas até o cache caber em `max_mb`."""
+    with _lock:
+        entries = []
+        for name in os.listdir(directory):
+            if not name.endswith(CACHE_SUFFIX):
+                continue
+            path = os.path.join(directory, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= max_mb * 1024 * 1024:
+                break
+            if path == keep:
+                continue
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
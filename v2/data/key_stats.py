@@ -0,0 +1,67 @@
+import threading
+from collections import OrderedDict
+from v2.output.counts.sentiment_type_counts import count_sentiment_types
+from v2.output.counts.toxic_type_counts import count_toxic_types
+
+"""
+    Key stats
+    Valores dos cards da página Stats calculados de uma vez: uma passada
+    pelas mensagens (palavras totais e distintas) e reduções vetorizadas nas
+    colunas (autores, respostas, sentimento, toxicidade). O resultado é
+    memorizado pelo fingerprint do dataset, então voltar à página ou
+    reenviar o mesmo arquivo não recalcula nada.
+"""
+
+STATS_CACHE_SIZE = 16  # Datasets com estatísticas memorizadas
+
+_stats = OrderedDict()  # fingerprint -> estatísticas
+_lock = threading.Lock()
+
+
+def _count_words(messages):
+    """Palavras totais e distintas em uma passada; a memória cresce com o
+    vocabulário, não com o total de palavras."""
+    total_words = 0
+    vocabulary = set()
+    for message in messages:
+        words = message.split()
+        total_words += len(words)
+        vocabulary.update(words)
+    return total_words, len(vocabulary)
+
+
+def compute_key_stats(dataset):
+    frame = dataset.frame
+    total_comments = len(frame)  # Comentários de topo e respostas
+    total_authors = int(frame['author'].nunique())
+    total_words, unique_words = _count_words(frame['message'].fillna(""))
+    sentiment_counts = count_sentiment_types(dataset)
+    return {
+        "total_comments": total_comments,
+        "total_replies": int(frame['is_reply'].sum()),
+        "total_authors": total_authors,
+        "avg_comments_per_person": round(total_comments / total_authors, 2) if total_authors else 0.0,
+        "total_words": total_words,
+        "unique_words": unique_words,
+        "avg_words_per_comment": total_words / total_comments if total_comments else 0.0,
+        "total_positive": sentiment_counts.get('POS', 0),
+        "total_neutral": sentiment_counts.get('NEU', 0),
+        "total_negative": sentiment_counts.get('NEG', 0),
+        "total_toxic": count_toxic_types(dataset).get('toxicity', 0),
+    }
+
+
+def get_key_stats(dataset):
+    """Estatísticas do dataset, memorizadas pelo fingerprint (LRU de STATS_CACHE_SIZE)."""
+    fingerprint = dataset.fingerprint()
+    with _lock:
+        if fingerprint in _stats:
+            _stats.move_to_end(fingerprint)
+            return _stats[fingerprint]
+
+    stats = compute_key_stats(dataset)
+    with _lock:
+        _stats[fingerprint] = stats
+        while len(_stats) > STATS_CACHE_SIZE:
+            _stats.popitem(last=False)
+    return stats
@@ -0,0 +1,72 @@
+import numpy as np
+
+"""
+    Rankings
+    Top-k de comentários por likes e por respostas. Os valores ficam em um
+    array numérico (os tipos já vêm normalizados na ingestão) e cada consulta
+    usa seleção parcial, O(n), em vez de ordenar o dataset inteiro; os
+    resultados de cada k são guardados no ranking, que fica no próprio
+    CommentDataset.
+"""
+
+
+class TopK:
+    """Ranking decrescente de `values`; `rows` são as posições das linhas no dataset."""
+
+    def __init__(self, values, rows):
+        self.values = np.asarray(values, dtype=np.int64)
+        self.rows = np.asarray(rows, dtype=np.int64)
+        self._results = {}  # k -> posições das linhas
+
+    def top(self, k):
+        """Posições das `k` linhas com maiores valores, como em
+        Series.nlargest(k): empates ficam na ordem do dataset."""
+        k = max(0, min(k, len(self.values)))
+        if k not in self._results:
+            self._results[k] = self.rows[self._select(k)]
+        return self._results[k]
+
+    def _select(self, k):
+        if k == 0:
+            return np.empty(0, dtype=np.int64)
+        values = self.values
+        kth = np.partition(values, len(values) - k)[len(values) - k]
+        greater = np.flatnonzero(values > kth)
+        # Do k-ésimo valor entram só os primeiros, na ordem do dataset
+        equal = np.flatnonzero(values == kth)[:k - len(greater)]
+        chosen = np.concatenate((greater, equal))
+        return chosen[np.lexsort((chosen, -values[chosen]))]
+
+
+class ReplyRanking(TopK):
+    """Comentários de topo por número de respostas (replyCount ou, sem ele,
+    respostas presentes no dataset), com as respostas de cada um em
+    formato CSR: `_replies[_indptr[row]:_indptr[row + 1]]`."""
+
+    def __init__(self, frame):
+        parent_rows = frame['parent_row'].to_numpy()
+        replies = np.flatnonzero(parent_rows >= 0)
+        order = np.argsort(parent_rows[replies], kind='stable')
+        self._replies = replies[order]
+        self._indptr = np.concatenate(([0], np.cumsum(np.bincount(parent_rows[replies], minlength=len(frame)))))
+
+        top_level = np.flatnonzero(~frame['is_reply'].to_numpy())
+        if 'replyCount' in frame.columns:
+            counts = frame['replyCount'].to_numpy()[top_level]
+        else:
+            counts = np.diff(self._indptr)[top_level]
+        super().__init__(counts, top_level)
+
+    def replies_of(self, row):
+        """Posições das respostas salvas do comentário na posição `row`."""
+        return self._replies[self._indptr[row]:self._indptr[row + 1]]
+
+
+def get_like_ranking(dataset):
+    """Ranking de todas as linhas por likeCount, construído na primeira chamada."""
+    return dataset.cached('like_ranking', lambda data: TopK(data.frame['likeCount'].to_numpy(), np.arange(len(data))))
+
+
+def get_reply_ranking(dataset):
+    """Ranking dos comentários de topo por respostas, construído na primeira chamada."""
+    return dataset.cached('reply_ranking', lambda data: ReplyRanking(data.frame))
@@ -0,0 +1,50 @@
+import numpy as np
+from v2.data.comment_dataset import TOXIC_TYPES
+
+"""
+    Toxicity engine
+    Os scores dos tipos de toxicidade em uma matriz N x 7 (float32) e a
+    matriz booleana "acima do limiar" calculada uma vez por dataset. Contagens
+    por tipo, taxa de comentários com algum tipo tóxico e as linhas de cada
+    tipo saem de reduções vetorizadas sobre ela.
+"""
+
+TOXIC_THRESHOLD = 0.7  # Score a partir do qual (exclusive) o tipo conta como tóxico
+
+
+class ToxicityMatrix:
+    """Scores (`scores`, N x tipos presentes) e marcações acima do limiar (`flags`)."""
+
+    def __init__(self, frame, threshold=TOXIC_THRESHOLD):
+        self.types = [toxic_type for toxic_type in TOXIC_TYPES if toxic_type in frame.columns]
+        self._positions = {toxic_type: i for i, toxic_type in enumerate(self.types)}
+        self.scores = np.empty((len(frame), len(self.types)), dtype=np.float32)
+        for i, toxic_type in enumerate(self.types):
+            self.scores[:, i] = frame[toxic_type].to_numpy(dtype=np.float32, na_value=np.nan)
+        self.flags = self.scores > threshold  # NaN nunca passa do limiar
+        self.counts = self.flags.sum(axis=0)
+        self._rows = {}  # tipo -> posições das linhas acima do limiar
+
+    def count(self, toxic_type):
+        i = self._positions.get(toxic_type)
+        return 0 if i is None else int(self.counts[i])
+
+    def any_rate(self):
+        """Fração das linhas com pelo menos um tipo acima do limiar."""
+        if not len(self.flags) or not self.types:
+            return 0.0
+        return float(self.flags.any(axis=1).mean())
+
+    def rows(self, toxic_type):
+        """Posições das linhas com `toxic_type` acima do limiar."""
+        i = self._positions.get(toxic_type)
+        if i is None:
+            return np.empty(0, dtype=np.int64)
+        if toxic_type not in self._rows:
+            self._rows[toxic_type] = np.flatnonzero(self.flags[:, i])
+        return self._rows[toxic_type]
+
+
+def get_toxicity(dataset):
+    """Matriz de toxicidade do dataset, construída na primeira chamada."""
+    return dataset.cached('toxicity_matrix', lambda data: ToxicityMatrix(data.frame))
@@ -0,0 +1,81 @@
+import html
+import re
+import numpy as np
+import pandas as pd
+
+"""
+    Word index
+    Índice invertido palavra -> linhas do dataset, construído em uma única
+    passada sobre as mensagens e guardado no próprio CommentDataset. A
+    contagem das palavras mais usadas e a busca dos comentários que contêm
+    uma palavra viram consultas ao índice.
+"""
+
+MIN_WORD_LENGTH = 4  # Palavras com até 3 letras são ignoradas
+ROW_SEPARATOR = "\x1f"  # Caractere de controle (unit separator), fora de qualquer palavra
+# Palavras (sequências de \w) longas o bastante, ou o separador entre mensagens
+TOKEN_PATTERN = re.compile(rf"\w{{{MIN_WORD_LENGTH},}}|{ROW_SEPARATOR}", flags=re.UNICODE)
+
+
+class WordIndex:
+    """Contagem de ocorrências e lista de linhas (posições) de cada palavra.
+
+    Palavras: mensagem com HTML desfeito, em minúsculas, quebrada em tudo que
+    não é letra, dígito ou _, mantendo só as com MIN_WORD_LENGTH ou mais.
+
+    As listas ficam em formato CSR: `_rows[_indptr[i]:_indptr[i + 1]]` são as
+    linhas, em ordem, que contêm a palavra `vocabulary[i]`.
+    """
+
+    def __init__(self, messages):
+        # Uma única string com todas as mensagens: unescape, lower e regex rodam
+        # uma vez em C em vez de uma vez por comentário
+        text = ROW_SEPARATOR.join(messages.fillna("").tolist())
+        if "&" in text:
+            text = html.unescape(text)
+        tokens = np.array(TOKEN_PATTERN.findall(text.lower()), dtype=object)
+        is_separator = tokens == ROW_SEPARATOR
+        rows = np.cumsum(is_separator, dtype=np.int64)[~is_separator]
+        tokens = tokens[~is_separator]
+
+        # Códigos na ordem da primeira ocorrência, como o Counter original
+        codes, self.vocabulary = pd.factorize(tokens)
+        self.counts = np.bincount(codes, minlength=len(self.vocabulary))
+
+        # Ordenação estável por palavra mantém as linhas em ordem; repetições na mesma linha saem
+        order = np.argsort(codes, kind='stable')
+        codes, rows = codes[order], rows[order]
+        repeated = np.zeros(len(codes), dtype=bool)
+        repeated[1:] = (codes[1:] == codes[:-1]) & (rows[1:] == rows[:-1])
+        self._rows = rows[~repeated].astype(np.int32)
+        self._indptr = np.concatenate(([0], np.cumsum(np.bincount(codes[~repeated], minlength=len(self.vocabulary)))))
+        self._positions = pd.Index(self.vocabulary)
+
+    @property
+    def total_words(self):
+        return int(self.counts.sum())
+
+    def most_common(self, n):
+        """As `n` palavras mais frequentes, como em Counter.most_common."""
+        order = np.argsort(-self.counts, kind='stable')[:n]
+        return [(self.vocabulary[i], int(self.counts[i])) for i in order]
+
+    def frequencies(self, n, exclude=()):
+        """Tabela {palavra: ocorrências} das `n` mais frequentes, sem as de `exclude`."""
+        keep = ~self._positions.isin(list(exclude))
+        order = np.argsort(-self.counts, kind='stable')
+        order = order[keep[order]][:n]
+        return {self.vocabulary[i]: int(self.counts[i]) for i in order}
+
+    def rows_with(self, word):
+        """Posições das linhas que contêm `word` (palavra exata, normalizada)."""
+        try:
+            i = self._positions.get_loc(word)
+        except KeyError:
+            return np.empty(0, dtype=np.int32)
+        return self._rows[self._indptr[i]:self._indptr[i + 1]]
+
+
+def get_word_index(dataset):
+    """Índice de palavras do dataset, construído na primeira chamada."""
+    return dataset.cached('word_index', lambda data: WordIndex(data.frame['message']))
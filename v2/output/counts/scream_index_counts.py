@@ -1,14 +1,8 @@
-import json
-import os
-
 def scream_index_mean(data):
-    """ Calculate the mean Scream Index from a JSON file.
-    This function reads a JSON file containing objects with a 'scream_index' field,
-    calculates the mean of these indices, and prints the result.
+    """ Calculate the mean Scream Index of the comments dataset.
+    Comments without a 'scream_index' value are ignored.
     """
-    scream_indices = [obj['scream_index'] for obj in data if 'scream_index' in obj]
-    if scream_indices:
-        return sum(scream_indices) / len(scream_indices)
-    return 0.0
-
-    
\ No newline at end of file
+    if not data.has_column('scream_index'):
+        return 0.0
+    mean = data.frame['scream_index'].mean()
+    return float(mean) if mean == mean else 0.0  # NaN quando não há valores
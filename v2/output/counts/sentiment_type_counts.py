@@ -1,27 +1,16 @@
-import json
-from collections import defaultdict
-
 def count_sentiment_types(data):
     """
-    Counts occurrences of each sentiment type from a JSON file.
+    Counts occurrences of each sentiment type in the comments dataset.
 
     Args:
-        data (list[dict]): JSON data with comments
+        data (CommentDataset): Columnar dataset with comments
 
     Returns:
         dict: A dictionary with sentiment types as keys and their counts as values.
     """
-    sentiment_types_count = defaultdict(int)
-
-    sentiment_types = [
-        'NEU',
-        'POS',
-        'NEG'
-    ]
-
-    for item in data:
-        sentiment = item.get('sentiment')  # retorna None se não existir
-        if sentiment is not None:
-            sentiment_types_count[sentiment] += 1
+    if not data.has_column('sentiment'):
+        return {}
 
-    return dict(sentiment_types_count)
+    # Colunas categóricas também listam categorias sem ocorrências
+    counts = data.frame['sentiment'].value_counts()
+    return {sentiment: int(count) for sentiment, count in counts.items() if count}
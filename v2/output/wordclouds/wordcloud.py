@@ -1,38 +1,76 @@
+import functools
+import io
 import json
-import os
 from wordcloud import WordCloud
 from nltk.corpus import stopwords
 import nltk
-import re
+from v2.data.word_index import WordIndex, get_word_index
+from v2.output.wordclouds.wordcloud_cache import get_image_key, load_image, save_image
 
-def file_to_json(json_file):    
+MAX_WORDS = 200  # Palavras da tabela de frequência e das nuvens standard/print (padrão do WordCloud)
+PREVIEW_WORDS = 100  # Palavras desenhadas no preview
+# Resoluções: preview nas telas interativas, print só sob demanda. width x height
+# é o tamanho da imagem; o layout é calculado em (width x height) / scale e
+# ampliado, então o preview (scale 2) calcula em um quarto da área (~0.2s x ~0.6s)
+WORDCLOUD_PROFILES = {
+    'preview': {'width': 640, 'height': 360, 'scale': 2, 'max_words': PREVIEW_WORDS, 'background_color': 'white'},
+    'standard': {'width': 1280, 'height': 720, 'scale': 1, 'max_words': MAX_WORDS, 'background_color': 'white'},
+    'print': {'width': 1920, 'height': 1080, 'scale': 1, 'max_words': MAX_WORDS, 'background_color': 'white'},
+}
+
+def file_to_json(json_file):
     with open(json_file, 'r', encoding='utf-8') as file:
         data = json.load(file)
     return data
 
-nltk.download('stopwords')
-
-def gerar_nuvem_palavras(json_data, complemento=''):
-
-    all_words = []
-
-    emoji_pattern = r':[a-zA-Z0-9-]+:'
-
-    for item in json_data:
-        message = item['message'].lower()
-        message = re.sub(emoji_pattern, '', message)
-        words = message.split()
-        all_words.extend(words)
+@functools.lru_cache(maxsize=1)
+def get_stopwords():
+    """Stopwords em português, carregadas (e baixadas, se preciso) uma vez por processo."""
+    try:
+        return frozenset(stopwords.words('portuguese'))
+    except LookupError:
+        nltk.download('stopwords', quiet=True)
+    try:
+        return frozenset(stopwords.words('portuguese'))
+    except LookupError:
+        return frozenset()
 
-    text = ' '.join(all_words)
-    stop_words = set(stopwords.words('portuguese'))
-    wordcloud = WordCloud(stopwords=stop_words, background_color='white', width=1920, height=1080).generate(text)
+def get_term_frequencies(dataset, complemento='', select=None):
+    """Tabela de frequência das palavras (sem stopwords) do dataset, ou das
+    linhas de `select(dataset)`. Usa o mesmo índice de palavras do Most Used
+    Words; o índice de cada filtro fica guardado no dataset."""
+    if select is None:
+        word_index = get_word_index(dataset)
+    else:
+        word_index = dataset.cached(
+            f'word_index_{complemento}', lambda data: WordIndex(select(data)['message'])
+        )
+    return word_index.frequencies(MAX_WORDS, exclude=get_stopwords())
 
-    output_dir = 'v2/output/wordclouds/images'
-    os.makedirs(output_dir, exist_ok=True)
-    output_file = os.path.join(output_dir, f'nuvem_palavras{complemento}.png')
+def gerar_nuvem_palavras(frequencies, settings=WORDCLOUD_PROFILES['standard']):
+    """Gera a nuvem de palavras a partir de {palavra: ocorrências} com as
+    configurações de um perfil de WORDCLOUD_PROFILES e retorna os bytes do PNG."""
+    settings = dict(settings)
+    scale = settings.pop('scale', 1)
+    width, height = settings.pop('width') // scale, settings.pop('height') // scale
+    wordcloud = WordCloud(width=width, height=height, scale=scale, **settings).generate_from_frequencies(frequencies)
 
-    wordcloud.to_file(output_file)
-    print(f'Nuvem de palavras salva em: {output_file}')
+    output = io.BytesIO()
+    wordcloud.to_image().save(output, format='PNG')
+    return output.getvalue()
 
-    return output_file
\ No newline at end of file
+def get_nuvem_palavras(dataset, complemento='', select=None, profile='preview'):
+    """Nuvem de palavras (bytes do PNG) do dataset, ou das linhas retornadas
+    por `select(dataset)` quando há filtro (`complemento` identifica o filtro),
+    gerada uma vez por dataset, filtro e perfil de resolução. Retorna None se
+    não houver palavras."""
+    settings = WORDCLOUD_PROFILES[profile]
+    key = get_image_key(dataset.fingerprint(), complemento, settings)
+    image = load_image(key)
+    if image is None:
+        frequencies = get_term_frequencies(dataset, complemento, select)
+        if not frequencies:
+            return None
+        image = gerar_nuvem_palavras(frequencies, settings)
+        save_image(key, image)
+    return image
@@ -0,0 +1,43 @@
+import threading
+from collections import OrderedDict
+
+"""
+    Word cloud cache
+    Imagens PNG das nuvens de palavras guardadas em memória, por processo,
+    com chave (fingerprint do dataset, filtro, configurações de renderização).
+    Cada sessão recebe os bytes da imagem, sem caminho de arquivo
+    compartilhado; o total é limitado a MAX_CACHE_MB, removendo primeiro as
+    imagens usadas há mais tempo.
+"""
+
+MAX_CACHE_MB = 64  # Tamanho máximo das imagens em memória
+
+_images = OrderedDict()  # chave -> bytes do PNG
+_total_bytes = 0
+_lock = threading.Lock()
+
+
+def get_image_key(fingerprint, filter_name, settings):
+    return (fingerprint, filter_name, tuple(sorted(settings.items())))
+
+
+def load_image(key):
+    """Bytes da imagem salva com `key`, ou None."""
+    with _lock:
+        image = _images.get(key)
+        if image is not None:
+            _images.move_to_end(key)
+        return image
+
+
+def save_image(key, image, max_mb=MAX_CACHE_MB):
+    """Guarda `image` e remove as menos usadas até caber em `max_mb`."""
+    global _total_bytes
+    with _lock:
+        if key in _images:
+            _total_bytes -= len(_images.pop(key))
+        _images[key] = image
+        _total_bytes += len(image)
+        while _total_bytes > max_mb * 1024 * 1024 and len(_images) > 1:
+            _, evicted = _images.popitem(last=False)
+            _total_bytes -= len(evicted)
@@ -0,0 +1,124 @@
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from v2.data.comment_dataset import TOXIC_TYPES
+from v2.output.filter.toxic_types_filter import toxic_types_filter
+from v2.output.wordclouds.wordcloud import (
+    WORDCLOUD_PROFILES, gerar_nuvem_palavras, get_nuvem_palavras, get_term_frequencies
+)
+from v2.output.wordclouds.wordcloud_cache import get_image_key, load_image, save_image
+
+"""
+    Word cloud jobs
+    Renderização em segundo plano das nuvens de palavras dos sete tipos de
+    toxicidade. Uma thread monta a tabela de frequência de cada tipo e envia
+    o desenho (a parte cara) para um pool de processos; cada imagem pronta
+    vai para o cache de imagens, e a página Toxic Speech só lê o cache ao
+    trocar de tipo.
+"""
+
+MAX_WORKERS = min(len(TOXIC_TYPES), os.cpu_count() or 1)  # Processos de renderização
+
+_executor = None
+_pending = {}  # chave da imagem -> Future da renderização
+_running = set()  # (fingerprint, perfil) com thread de envio ativa
+_lock = threading.Lock()
+
+
+def _get_executor():
+    global _executor
+    with _lock:
+        if _executor is None:
+            # spawn: o processo do Streamlit tem threads, e fork com threads não é seguro
+            _executor = ProcessPoolExecutor(
+                max_workers=MAX_WORKERS, mp_context=multiprocessing.get_context('spawn')
+            )
+        return _executor
+
+
+def _discard_executor(executor):
+    """Descarta um pool quebrado (worker morto), para a próxima chamada criar outro."""
+    global _executor
+    with _lock:
+        if _executor is executor:
+            _executor = None
+    executor.shutdown(wait=False, cancel_futures=True)
+
+
+def _select_toxic_type(toxic_type):
+    return lambda dataset: toxic_types_filter(dataset, toxic_type)
+
+
+def _store(key, executor):
+    def done(future):
+        with _lock:
+            _pending.pop(key, None)
+        if future.cancelled():
+            return
+        if isinstance(future.exception(), BrokenProcessPool):
+            _discard_executor(executor)
+        elif future.exception() is None:
+            save_image(key, future.result())
+    return done
+
+
+def _submit_toxic_clouds(dataset, settings):
+    for toxic_type in TOXIC_TYPES:
+        if not dataset.has_column(toxic_type):
+            continue
+        key = get_image_key(dataset.fingerprint(), toxic_type, settings)
+        with _lock:
+            if key in _pending:
+                continue
+        if load_image(key) is not None:
+            continue
+        frequencies = get_term_frequencies(dataset, toxic_type, _select_toxic_type(toxic_type))
+        if not frequencies:
+            continue
+        executor = _get_executor()
+        try:
+            future = executor.submit(gerar_nuvem_palavras, frequencies, settings)
+        except (BrokenProcessPool, RuntimeError, OSError):
+            # Sem pool de processos, as nuvens são geradas sob demanda na página
+            _discard_executor(executor)
+            return
+        with _lock:
+            _pending[key] = future
+        future.add_done_callback(_store(key, executor))
+
+
+def prerender_toxic_clouds(dataset, profile='preview'):
+    """Dispara, sem bloquear, a renderização das nuvens dos tipos de
+    toxicidade de `dataset` que ainda não estão no cache."""
+    if not dataset.has_column('toxicity'):
+        return
+    job = (dataset.fingerprint(), profile)
+    with _lock:
+        if job in _running:
+            return
+        _running.add(job)
+
+    def run():
+        try:
+            _submit_toxic_clouds(dataset, WORDCLOUD_PROFILES[profile])
+        finally:
+            with _lock:
+                _running.discard(job)
+
+    threading.Thread(target=run, daemon=True).start()
+
+
+def get_toxic_cloud(dataset, toxic_type, profile='preview'):
+    """Nuvem do tipo `toxic_type`: do cache, da renderização em andamento
+    ou, se nenhuma das duas, gerada agora."""
+    key = get_image_key(dataset.fingerprint(), toxic_type, WORDCLOUD_PROFILES[profile])
+    with _lock:
+        future = _pending.get(key)
+    if future is not None:
+        try:
+            return future.result()
+        except Exception:
+            pass  # Falhou no worker; tenta de novo no processo atual
+    return get_nuvem_palavras(dataset, toxic_type, _select_toxic_type(toxic_type), profile)